@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+
+# Copyright (C) 2025, Simona Dimitrova
+
+import argparse
+import os
+import subprocess
+import sys
+
+
+# Cold start budget for importing a frontend (in milliseconds)
+TARGET = 500
+
+# Modules that must never be imported just to parse arguments or show help
+FORBIDDEN = [
+    "mediapipe",
+    "face_recognition",
+    "dlib",
+    "tensorflow",
+    "pillow_heif",
+]
+
+MODULES = [
+    "faceblur.frontend.cli",
+]
+
+
+def _import_time(module):
+    # Import in a fresh interpreter, so that nothing is cached
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(["src"] + [p for p in [env.get("PYTHONPATH")] if p])
+
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            env=env, capture_output=True, text=True, check=True)
+
+    # import time: self [us] | cumulative | imported package
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+
+        self_time, cumulative, name = line[len("import time:"):].split("|")
+        times[name.strip()] = int(self_time), int(cumulative)
+
+    return times
+
+
+def import_time(modules=MODULES, target=TARGET, runs=5, top=10):
+    failed = False
+
+    for module in modules:
+        # Take the best of several runs to reduce noise
+        results = [_import_time(module) for run in range(runs)]
+        times = min(results, key=lambda t: t[module][1])
+        total = times[module][1] / 1000
+
+        print(f"{module}: {total:.1f} ms (target {target} ms)")
+
+        print(f"  Slowest {top} imports (cumulative):")
+        for name, (self_time, cumulative) in sorted(times.items(), key=lambda t: -t[1][1])[:top]:
+            print(f"    {cumulative / 1000:8.1f} ms {name}")
+
+        forbidden = sorted(set(name.split(".")[0] for name in times) & set(FORBIDDEN))
+        if forbidden:
+            print(f"  Imports forbidden modules: {', '.join(forbidden)}")
+            failed = True
+
+        if total > target:
+            print(f"  Over target by {total - target:.1f} ms")
+            failed = True
+
+    return not failed
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        "Small tool used to measure how long it takes to import the frontends using python -X importtime.")
+
+    parser.add_argument("modules",
+                        nargs="*",
+                        default=MODULES,
+                        help=f"Modules to import. Defaults to {', '.join(MODULES)}.")
+
+    parser.add_argument("--target", "-t",
+                        type=float,
+                        default=TARGET,
+                        help=f"Cold start target (in milliseconds). Defaults to {TARGET}.")
+
+    parser.add_argument("--runs", "-r",
+                        type=int,
+                        default=5,
+                        help="How many times to import each module. The fastest run is reported. Defaults to 5.")
+
+    parser.add_argument("--top", "-n",
+                        type=int,
+                        default=10,
+                        help="How many of the slowest imports to show. Defaults to 10.")
+
+    args = parser.parse_args()
+
+    sys.exit(0 if import_time(**vars(args)) else 1)
+
+
+if __name__ == "__main__":
+    main()
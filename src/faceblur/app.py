@@ -1,8 +1,11 @@
 # Copyright (C) 2025, Simona Dimitrova
 
 import av
+import contextlib
+import functools
 import json
 import logging
+import numpy as np
 import os
 import tqdm
 
@@ -10,12 +13,14 @@ import faceblur.av.container as fb_container
 import faceblur.av.video as fb_video
 import faceblur.faces.identify as fb_identify
 import faceblur.faces.debug as fb_debug
+import faceblur.faces.detector as fb_detector
 import faceblur.faces.obfuscate as fb_obfuscate
 import faceblur.faces.process as fb_process
 import faceblur.faces.mode as fb_mode
 import faceblur.faces.model as fb_model
 import faceblur.image as fb_image
 import faceblur.path as fb_path
+import faceblur.schedule as fb_schedule
 import faceblur.threading as fb_threading
 
 
@@ -72,7 +77,12 @@ def _create_output(filename, output, format=None):
     return os.path.join(output, os.path.basename(filename))
 
 
-def _process_video_frame(frame: fb_video.VideoFrame, faces, mode, mode_options):
+def _process_video_frame(frame: fb_video.VideoFrame, faces, mode, mode_options, executor=None, cache=None,
+                         backend=fb_obfuscate.DEFAULT_BACKEND):
+    if cache is not None:
+        # Every frame ages the reusable patches, including the ones without faces
+        cache.next_frame()
+
     # do extra processing only if any faces were found
     if mode == fb_mode.Mode.DEBUG:
         if faces:
@@ -87,12 +97,21 @@ def _process_video_frame(frame: fb_video.VideoFrame, faces, mode, mode_options):
             frame = fb_video.VideoFrame.from_image(image, frame)
 
     elif mode in fb_obfuscate.MODES:
-        if faces:
+        if faces and backend == fb_obfuscate.Backend.NUMPY:
+            # Obfuscate in place on a copy of the pixels of the frame (using processed faces),
+            # as to_ndarray() may return a view of the decoded frame shared by all outputs
+            array = np.array(frame.to_ndarray(), copy=True)
+            fb_obfuscate.blur_faces(mode, array, faces[1] if faces[1] is not None else faces[0], **mode_options,
+                                    executor=executor)
+            frame = fb_video.VideoFrame.from_ndarray(array, frame)
+
+        elif faces:
             # av.video.frame.VideoFrame -> PIL.Image
             image = frame.to_image()
 
             # Obfuscate via a rectangular gaussian blur (using processed faces)
-            image = fb_obfuscate.blur_faces(mode, image, faces[1] if faces[1] is not None else faces[0], **mode_options)
+            image = fb_obfuscate.blur_faces(mode, image, faces[1] if faces[1] is not None else faces[0], **mode_options,
+                                            executor=executor, cache=cache)
 
             # PIL.Image -> av.video.frame.VideoFrame
             frame = fb_video.VideoFrame.from_image(image, frame)
@@ -102,6 +121,55 @@ def _process_video_frame(frame: fb_video.VideoFrame, faces, mode, mode_options):
     return frame
 
 
+def _has_faces(faces, mode):
+    # faces are (original, processed). Obfuscating uses the processed faces (if any), DEBUG draws both
+    original, processed = faces
+    if mode == fb_mode.Mode.DEBUG:
+        return len(original) > 0 or (processed is not None and len(processed) > 0)
+
+    return len(processed if processed is not None else original) > 0
+
+
+def _write_unchanged(input_filename, output_filename, encoder=None, remux=None):
+    # For outputs without any faces to obfuscate (or draw): the input as it is (in the same format),
+    # else remuxed (only changing the container format). Returns how it was written or None if it must be encoded
+    if encoder:
+        return None
+
+    if os.path.splitext(input_filename)[1].lower() == os.path.splitext(output_filename)[1].lower():
+        if os.path.exists(output_filename) and os.path.samefile(input_filename, output_filename):
+            # Output is the input
+            return "none"
+
+        return fb_path.copy_file(input_filename, output_filename)
+
+    return remux() if remux else None
+
+
+def _remux_video(input_filename, output_filename, thread_type=fb_video.DEFAULT_THREAD_TYPE, threads=os.cpu_count()):
+    with fb_container.InputContainer(input_filename, thread_type, threads) as input_container:
+        if any(stream.rotated for stream in input_container.streams if stream.type == "video"):
+            # Rotation is applied while decoding
+            return None
+
+        try:
+            with fb_container.OutputContainer(output_filename, input_container, remux=True) as output_container:
+                for packet in input_container.demux():
+                    output_container.mux(packet)
+        except (av.FFmpegError, ValueError) as e:
+            # e.g. the codec is not supported by the new container
+            logging.getLogger(__name__).debug(f"Could not remux '{input_filename}' to '{output_filename}': {e}")
+
+            try:
+                os.remove(output_filename)
+            except:
+                pass
+
+            return None
+
+    return "remux"
+
+
 def _get_debug_root(input_filename, output_filename, model, model_options, format=None, encoder=None):
     root = {
         "input": input_filename,
@@ -121,117 +189,226 @@ def _get_debug_root(input_filename, output_filename, model, model_options, forma
     return root
 
 
-def _faceblur_image(input_filename, output, model, model_options, mode, mode_options, format=None):
+def _get_outputs(output, mode, mode_options, image_options, video_options, outputs=None):
+    # Each of the outputs overrides some of the options,
+    # e.g. [{"mode": DEBUG, "output": "review"}, {"video_options": {"format": "mkv"}, "output": "mkv"}]
+    default = {
+        "output": output,
+        "mode": mode,
+        "mode_options": mode_options,
+        "image_options": image_options,
+        "video_options": video_options,
+    }
+
+    return [default | output for output in outputs] if outputs else [default]
+
+
+def _create_outputs(filename, outputs):
+    # outputs are [(output, format)]
+    filenames = [_create_output(filename, output, format) for output, format in outputs]
+
+    if len(set(filenames)) != len(filenames):
+        raise ValueError(f"Outputs of '{filename}' would overwrite each other: {', '.join(filenames)}")
+
+    return filenames
+
+
+def _faceblur_image(input_filename, model, model_options, outputs, threads=os.cpu_count()):
+    output_filenames = _create_outputs(
+        input_filename, [(output["output"], output["image_options"].get("format")) for output in outputs])
+
     # Load
     image = fb_image.image_open(input_filename)
 
-    # Find faces
+    # Find faces (once for all outputs)
     faces = fb_identify.identify_faces_from_image(image, model, model_options=model_options)
 
-    output_filename = _create_output(input_filename, output, format)
+    with fb_obfuscate.create_executor(threads) as executor:
+        for output, output_filename in zip(outputs, output_filenames):
+            mode = output["mode"]
+            format = output["image_options"].get("format")
 
-    if mode == fb_mode.Mode.DEBUG:
-        # Save face boxes to file
-        with open(f"{output_filename}.json", "w") as f:
-            root = _get_debug_root(input_filename, output_filename, model, model_options, format)
-            root["faces"] = [face.to_json() for face in faces]
-            json.dump(root, f, indent=4)
-
-        # Draw face boxes
-        image = fb_debug.debug_faces(image, (faces, None))
-    elif mode in fb_obfuscate.MODES:
-        # Obfuscate via a rectangular gaussian blur
-        image = fb_obfuscate.blur_faces(mode, image, faces, **mode_options)
-    else:
-        raise ValueError(f"Unsupported mode: {mode}")
+            # Patches can only be reused between frames, images are always obfuscated with PIL
+            mode_options = dict(output["mode_options"])
+            mode_options.pop("patch_reuse", None)
+            mode_options.pop("backend", None)
+
+            # Nothing to obfuscate (or draw): write the input as it is
+            method = None if _has_faces((faces, None), mode) else _write_unchanged(input_filename, output_filename)
+
+            # Each output starts from the original image
+            output_image = image.copy()
+
+            if mode == fb_mode.Mode.DEBUG:
+                # Save face boxes to file
+                with open(f"{output_filename}.json", "w") as f:
+                    root = _get_debug_root(input_filename, output_filename, model, model_options, format)
+                    root["faces"] = [face.to_json() for face in faces]
+                    root["output_method"] = method or "encode"
+                    json.dump(root, f, indent=4)
+
+            if method:
+                continue
 
-    # Save
-    image.save(output_filename)
+            if mode == fb_mode.Mode.DEBUG:
+                # Draw face boxes
+                output_image = fb_debug.debug_faces(output_image, (faces, None))
+            elif mode in fb_obfuscate.MODES:
+                # Obfuscate via a rectangular gaussian blur
+                output_image = fb_obfuscate.blur_faces(mode, output_image, faces, **mode_options, executor=executor)
+            else:
+                raise ValueError(f"Unsupported mode: {mode}")
+
+            # Save
+            output_image.save(output_filename)
 
 
 def _faceblur_video(
-        input_filename, output,
+        input_filename,
         model, model_options,
         tracking_options,
-        mode, mode_options,
+        outputs,
         progress_type,
         stop,
-        format=None,
-        encoder=None,
         thread_type=fb_video.DEFAULT_THREAD_TYPE,
         threads=os.cpu_count()):
 
+    output_filenames = _create_outputs(
+        input_filename, [(output["output"], output["video_options"].get("format")) for output in outputs])
+
     # First find the faces. We can't do that on a frame-by-frame basis as it requires
     # to have the full data to interpolate missing face locations
     with fb_container.InputContainer(input_filename, thread_type, threads) as input_container:
         faces = fb_identify.identify_faces_from_video(
             input_container, model, model_options=model_options, progress=progress_type, stop=stop)
 
+    # All faces found by the model, with their scores (if provided by it)
+    detections = {stream: faces_in_stream[0] for stream, faces_in_stream in faces.items()}
+
     if tracking_options:
         # Use face tracking and interpolation between frames
         # Clear false positive, fill in false negatives
         faces = {
-            stream: fb_process.process_faces_in_frames(
-                frames_in_stream[0],
-                frames_in_stream[1],
-                frames_in_stream[2],
-                **tracking_options) for stream, frames_in_stream in faces.items()}
+            stream: fb_process.process_faces(
+                faces_in_stream[0],
+                faces_in_stream[1],
+                confidence=faces_in_stream[2],
+                **tracking_options) for stream, faces_in_stream in faces.items()}
     else:
         faces = {
-            stream: (faces_in_stream[0], None)
+            stream: (fb_detector.filter_table(faces_in_stream[0], faces_in_stream[2]), None)
             for stream, faces_in_stream in faces.items()}
 
-    output_filename = _create_output(input_filename, output, format)
-    if mode == fb_mode.Mode.DEBUG:
-        # Save face boxes to file
-        with open(f"{output_filename}.json", "w") as f:
-            root = _get_debug_root(input_filename, output_filename, model, model_options, format, encoder)
-            faces_json = {index:
-                          {
-                              "original": [[face.to_json() for face in frame] for frame in frames[0]],
-                              "processed": [[face.to_json() for face in frame] for frame in frames[1]] if tracking_options else [],
-                          }
-                          for index, frames in faces.items()}
-            root["streams"] = faces_json
-            root["tracking"] = tracking_options
-            json.dump(root, f, indent=4)
+    targets = []
+    for output, output_filename in zip(outputs, output_filenames):
+        mode = output["mode"]
+        format = output["video_options"].get("format")
+        encoder = output["video_options"].get("encoder")
+
+        # Reuse the blurred faces of tracked faces that did not change (one cache per stream)
+        mode_options = dict(output["mode_options"])
+        backend = mode_options.pop("backend", fb_obfuscate.DEFAULT_BACKEND)
+        patch_reuse = mode_options.pop("patch_reuse", fb_obfuscate.PATCH_REUSE)
+        caches = {stream: fb_obfuscate.PatchCache(patch_reuse)
+                  if patch_reuse and tracking_options and backend == fb_obfuscate.Backend.PIL else None
+                  for stream in faces}
+
+        # Nothing to obfuscate (or draw) in any of the streams: write the input as it is
+        method = None
+        if not any(_has_faces(faces_in_stream, mode) for faces_in_stream in faces.values()):
+            method = _write_unchanged(input_filename, output_filename, encoder, functools.partial(
+                _remux_video, input_filename, output_filename, thread_type, threads))
+
+        if method:
+            logging.getLogger(__name__).debug(f"No faces in '{input_filename}', output written as: {method}")
+        else:
+            targets.append({
+                "filename": output_filename,
+                "mode": mode,
+                "mode_options": mode_options,
+                "encoder": encoder,
+                "backend": backend,
+                "caches": caches,
+            })
+
+        if mode == fb_mode.Mode.DEBUG:
+            # Save face boxes to file
+            with open(f"{output_filename}.json", "w") as f:
+                root = _get_debug_root(input_filename, output_filename, model, model_options, format, encoder)
+                faces_json = {index:
+                              {
+                                  "original": frames[0].to_json(),
+                                  "processed": frames[1].to_json() if tracking_options else [],
+                                  "detections": detections[index].to_json(),
+                              }
+                              for index, frames in faces.items()}
+                root["streams"] = faces_json
+                root["tracking"] = tracking_options
+                root["output_method"] = method or "encode"
+                json.dump(root, f, indent=4)
+
+    if not targets:
+        # All outputs were written without decoding
+        return
 
     try:
         frame_index = 0
-        with fb_container.InputContainer(input_filename, thread_type, threads) as input_container:
-            with fb_container.OutputContainer(output_filename, input_container, encoder) as output_container:
-                with progress_type(desc="Encoding", total=input_container.video.frames, unit=" frames", leave=False) as progress:
-                    # Demux the packet from input
-                    for packet in input_container.demux():
-                        if packet.stream.type == "video":
-                            for frame in packet.decode():
-                                if stop:
-                                    stop.throwIfTerminated()
-
-                                # Get the list of faces for this stream and frame
-                                faces_in_frame = faces[frame.stream.index]
-                                faces_in_frame = faces_in_frame[0][frame_index], faces_in_frame[1][frame_index] if tracking_options else None
-                                frame_index += 1
-
-                                # Process (if necessary)
-                                frame = _process_video_frame(frame, faces_in_frame, mode, mode_options)
-
-                                # Encode + mux
-                                output_container.mux(frame)
-                                progress.update()
-
-                            if packet.dts is None:
-                                # Flush encoder
-                                output_container.mux(packet)
-                        else:
-                            # remux directly
+        with contextlib.ExitStack() as stack:
+            # Decode once, encode once for each output
+            input_container = stack.enter_context(
+                fb_container.InputContainer(input_filename, thread_type, threads))
+            output_containers = [stack.enter_context(
+                fb_container.OutputContainer(target["filename"], input_container, target["encoder"]))
+                for target in targets]
+            executor = stack.enter_context(fb_obfuscate.create_executor(threads))
+            progress = stack.enter_context(
+                progress_type(desc="Encoding", total=input_container.video.frames, unit=" frames", leave=False))
+
+            # Demux the packet from input
+            for packet in input_container.demux():
+                if packet.stream.type == "video":
+                    for frame in packet.decode():
+                        if stop:
+                            stop.throwIfTerminated()
+
+                        # Get the list of faces for this stream and frame
+                        original, processed = faces[frame.stream.index]
+                        faces_in_frame = original.frame(frame_index), processed.frame(
+                            frame_index) if tracking_options else None
+                        frame_index += 1
+
+                        for target, output_container in zip(targets, output_containers):
+                            # Process (if necessary). The decoded frame itself is never changed
+                            output_frame = _process_video_frame(
+                                frame, faces_in_frame, target["mode"], target["mode_options"], executor,
+                                target["caches"][frame.stream.index], target["backend"])
+
+                            # Encode + mux
+                            output_container.mux(output_frame)
+
+                        progress.update()
+
+                    if packet.dts is None:
+                        # Flush encoders
+                        for output_container in output_containers:
                             output_container.mux(packet)
+                else:
+                    # remux directly
+                    for output_container in output_containers:
+                        output_container.mux(packet)
+
+        for target in targets:
+            for stream, cache in target["caches"].items():
+                if cache:
+                    logging.getLogger(__name__).debug(
+                        f"Patch cache for stream {stream} of {target['filename']}: {cache.cache_info()}")
     except Exception as e:
-        # Error/Stop request while encoding, make sure to remove the output
-        try:
-            os.remove(output_filename)
-        except:
-            pass
+        # Error/Stop request while encoding, make sure to remove the outputs
+        for target in targets:
+            try:
+                os.remove(target["filename"])
+            except:
+                pass
 
         raise e
 
@@ -246,7 +423,9 @@ def app(
         mode_options={},
         image_options={},
         video_options={},
+        outputs=None,
         thread_options={},
+        schedule=fb_schedule.DEFAULT,
         on_done=None,
         on_error=None,
         stop: fb_threading.TerminatingCookie = None,
@@ -262,8 +441,14 @@ def app(
     else:
         logging.basicConfig(format=logging_format)
 
-    # Start processing them one by one
+    # Several outputs for each input, detecting the faces only once
+    outputs = _get_outputs(output, mode, mode_options, image_options, video_options, outputs)
+
+    # Start processing them one by one, in the order of the scheduling policy (by the estimated work of each)
     filenames = get_supported_filenames(inputs)
+    costs = {filename: fb_schedule.estimate_cost(filename) for filename in filenames}
+    filenames = fb_schedule.schedule(filenames, costs, schedule)
+    estimator = fb_schedule.Estimator(costs)
     failed = False
     with total_progress(total=len(filenames), unit=" file(s)") as progress:
         for input_filename in filenames:
@@ -273,19 +458,31 @@ def app(
                 if stop:
                     stop.throwIfTerminated()
 
+                estimator.start(input_filename)
+
                 if fb_path.is_filename_from_ext_group(input_filename, fb_image.EXTENSIONS):
                     # Handle images
-                    _faceblur_image(input_filename, output, model, model_options, mode, mode_options, **image_options)
+                    _faceblur_image(input_filename, model, model_options, outputs,
+                                    threads=thread_options.get("threads", os.cpu_count()))
                 else:
                     # Assume video
-                    _faceblur_video(input_filename, output, model, model_options, tracking_options, mode, mode_options,
+                    _faceblur_video(input_filename, model, model_options, tracking_options, outputs,
                                     file_progress, stop,
-                                    **video_options,
                                     **thread_options)
 
+                mask_cache = fb_obfuscate.MASKS.cache_info()
+                if mask_cache.hits + mask_cache.misses:
+                    hit_rate = mask_cache.hits / (mask_cache.hits + mask_cache.misses)
+                    logging.getLogger(__name__).debug(f"Mask cache hit rate: {hit_rate:.0%} ({mask_cache})")
+
                 if on_done:
                     on_done(input_filename)
 
+                estimator.done(input_filename)
+                remaining = estimator.remaining()
+                if remaining is not None:
+                    progress.set_postfix_str(fb_schedule.format_remaining(remaining))
+
                 progress.update()
 
             except fb_threading.TerminatedException as tex:
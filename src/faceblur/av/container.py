@@ -36,6 +36,22 @@ FORMATS = {
 EXTENSIONS = sorted(list(set([ext for format in FORMATS.values() for ext in format])))
 
 
+def probe_video(filename):
+    # (width, height, frames) of the first video stream without decoding it.
+    # The number of frames is estimated from the duration if not in the header
+    with av.open(filename, metadata_errors="ignore") as container:
+        if not container.streams.video:
+            raise ValueError(f"File '{filename}' does not contain any video streams")
+
+        stream = container.streams.video[0]
+        frames = stream.frames
+        if not frames and container.duration:
+            frame_rate = stream.average_rate or stream.guessed_rate or 0
+            frames = round(container.duration / av.time_base * float(frame_rate))
+
+        return stream.codec_context.width, stream.codec_context.height, frames
+
+
 class Container():
     def __init__(self, container: av.container.Container):
         self._container = container
@@ -126,7 +142,7 @@ class OutputContainer(Container):
     _container: av.container.OutputContainer
     _streams: dict[fb_stream.InputStream, fb_stream.OutputStream]
 
-    def __init__(self, filename: str, template: InputContainer = None, encoder=None):
+    def __init__(self, filename: str, template: InputContainer = None, encoder=None, remux=False):
         super().__init__(av.open(filename, "w"))
 
         self._streams = {}
@@ -134,11 +150,12 @@ class OutputContainer(Container):
         if template:
             # Create output streams matching the input ones
             for stream in template._streams.values():
-                self.add_stream_from_template(stream, encoder)
+                self.add_stream_from_template(stream, encoder, remux)
 
-    def add_stream_from_template(self, template: fb_stream.InputStream, encoder=None):
+    def add_stream_from_template(self, template: fb_stream.InputStream, encoder=None, remux=False):
         STREAM_TYPES = {
-            "video": fb_video.OutputVideoStream,
+            # remux copies the video packets as they are, i.e. without decoding/encoding
+            "video": fb_stream.CopyOutputStream if remux else fb_video.OutputVideoStream,
             # currently subtitles streams are not remuxed, as this needs to be tested
             # currently data streams are not remuxed, as no data encoders are present,
             # and creating a data stream without a codec only appears to work for .ts
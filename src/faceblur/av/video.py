@@ -3,6 +3,7 @@
 import av
 import av.container
 import av.stream
+import functools
 import logging
 import math
 import pymediainfo
@@ -32,7 +33,18 @@ def __check_codec(codec):
         return False
 
 
-ENCODERS = sorted([codec for codec in av.codecs_available if __check_codec(codec)])
+@functools.cache
+def get_encoders():
+    # Instantiating every available codec is slow, so do it only once and only when needed
+    return sorted([codec for codec in av.codecs_available if __check_codec(codec)])
+
+
+def __getattr__(name):
+    # Keep ENCODERS available, but compute it lazily
+    if name == "ENCODERS":
+        return get_encoders()
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def _get_angle360(angle: float):
@@ -109,6 +121,11 @@ class InputVideoStream(fb_stream.InputStream):
     def height(self):
         return self._height
 
+    @property
+    def rotated(self):
+        # Frames are rotated when decoded
+        return self._graph is not None
+
     @property
     def info(self):
         return self._info
@@ -129,6 +146,17 @@ class VideoFrame(fb_frame.Frame):
         new_frame.copy_metadata(frame)
         return new_frame
 
+    def to_ndarray(self):
+        # h x w x 3 array. Depending on the version of PyAV and the format, it may share the pixels of the frame
+        return self._frame.to_ndarray(format="rgb24")
+
+    @staticmethod
+    def from_ndarray(array, frame: fb_frame.Frame):
+        new_frame = av.VideoFrame.from_ndarray(array, format="rgb24")
+        new_frame = fb_frame.Frame(new_frame)
+        new_frame.copy_metadata(frame)
+        return new_frame
+
 
 class VideoPacket(fb_packet.Packet):
     _stream: InputVideoStream
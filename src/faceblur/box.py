@@ -1,8 +1,13 @@
 # Copyright (C) 2025, Simona Dimitrova
 
+import numpy as np
+
 
 class Box:
-    def __init__(self, top, right, bottom, left):
+    # There are a lot of them, so no __dict__
+    __slots__ = ("top", "right", "bottom", "left", "score")
+
+    def __init__(self, top, right, bottom, left, score=None):
         if left > right:
             raise ValueError(f"left={left} > right={right}")
 
@@ -15,6 +20,9 @@ class Box:
         self.bottom = bottom
         self.left = left
 
+        # Detection confidence (0...1), if provided by the model
+        self.score = score
+
     @property
     def width(self):
         return self.right - self.left
@@ -49,22 +57,33 @@ class Box:
         return (self.bottom - self.top + 1) * (self.right - self.left + 1)
 
     def normalise(self, width, height):
-        return Box(self.top / height, self.right / width, self.bottom / height, self.left / width)
+        return Box(self.top / height, self.right / width, self.bottom / height, self.left / width, self.score)
 
-    def denormalise(self, width, height):
-        box = Box(
-            int(self.top * height),
-            int(self.right * width),
-            int(self.bottom * height),
-            int(self.left * width))
+    def clip(self):
+        # Intersect the (normalised) box with the image, None if outside of it
+        top, right, bottom, left = max(0, self.top), min(1, self.right), min(1, self.bottom), max(0, self.left)
+
+        if top <= bottom and left <= right:
+            return Box(top, right, bottom, left, self.score)
+        else:
+            return None
 
+    def denormalise(self, width, height):
         # Make sure the face is within the image
-        max_box = Box(0, width - 1, height - 1, 0)
+        top = max(0, int(self.top * height))
+        right = min(width - 1, int(self.right * width))
+        bottom = min(height - 1, int(self.bottom * height))
+        left = max(0, int(self.left * width))
 
-        return box.intersect(max_box)
+        if top <= bottom and left <= right:
+            return Box(top, right, bottom, left)
+        else:
+            # Outside of the image
+            return None
 
     def __repr__(self):
-        return f"Box(top={self.top}, right={self.right}, bottom={self.bottom}, left={self.left})"
+        score = f", score={self.score}" if self.score is not None else ""
+        return f"Box(top={self.top}, right={self.right}, bottom={self.bottom}, left={self.left}{score})"
 
     def __eq__(self, other):
         return self.top == other.top and self.right == other.right and self.bottom == other.bottom and self.left == other.left
@@ -84,4 +103,64 @@ class Box:
         return intersection_area / union_area
 
     def to_json(self):
-        return vars(self)
+        # Only add the score if there is one
+        return {k: getattr(self, k) for k in self.__slots__ if k != "score" or self.score is not None}
+
+
+def to_array(boxes):
+    # N boxes -> N x 4 array of (top, right, bottom, left)
+    return np.array([(box.top, box.right, box.bottom, box.left) for box in boxes], dtype=np.float64).reshape(-1, 4)
+
+
+def normalise(boxes, width, height):
+    # N x 4 boxes in pixels -> N x 4 boxes relative to the image (same as Box.normalise())
+    return boxes / np.array([height, width, height, width], dtype=np.float64)
+
+
+def clip(boxes, width, height):
+    # Intersect N x 4 boxes in pixels with the image. Boxes outside of it are no longer valid
+    return np.stack((
+        np.maximum(boxes[:, 0], 0),
+        np.minimum(boxes[:, 1], width - 1),
+        np.minimum(boxes[:, 2], height - 1),
+        np.maximum(boxes[:, 3], 0)), axis=1)
+
+
+def denormalise(boxes, width, height):
+    # N x 4 normalised boxes -> N x 4 integer boxes in pixels within the image (same as Box.denormalise()).
+    # Use is_valid() to find the ones that were outside of the image, i.e. None for Box.denormalise()
+    boxes = (boxes * np.array([height, width, height, width], dtype=np.float64)).astype(np.int64)
+    return clip(boxes, width, height)
+
+
+def is_valid(boxes):
+    # Boxes that are not empty
+    return (boxes[:, 0] <= boxes[:, 2]) & (boxes[:, 3] <= boxes[:, 1])
+
+
+def union(a, b):
+    # Union of arrays of boxes (..., 4), broadcast against each other, same as Box.union()
+    return np.stack((
+        np.minimum(a[..., 0], b[..., 0]),
+        np.maximum(a[..., 1], b[..., 1]),
+        np.maximum(a[..., 2], b[..., 2]),
+        np.minimum(a[..., 3], b[..., 3])), axis=-1)
+
+
+def intersection_over_union(a, b):
+    # IoU of arrays of boxes (..., 4), broadcast against each other,
+    # same as calling Box.intersection_over_union() for each pair.
+    # E.g. for all pairs of N and M boxes: intersection_over_union(a[:, None], b[None, :]) -> N x M
+    top = np.maximum(a[..., 0], b[..., 0])
+    right = np.minimum(a[..., 1], b[..., 1])
+    bottom = np.minimum(a[..., 2], b[..., 2])
+    left = np.maximum(a[..., 3], b[..., 3])
+
+    intersects = (top <= bottom) & (left <= right)
+    intersection_area = (bottom - top + 1) * (right - left + 1)
+
+    area_a = (a[..., 2] - a[..., 0] + 1) * (a[..., 1] - a[..., 3] + 1)
+    area_b = (b[..., 2] - b[..., 0] + 1) * (b[..., 1] - b[..., 3] + 1)
+    union_area = area_a + area_b - intersection_area
+
+    return np.where(intersects, intersection_area / union_area, 0)
@@ -0,0 +1,53 @@
+# Copyright (C) 2025, Simona Dimitrova
+
+import os
+
+import faceblur.faces.dlib as fb_dlib
+import faceblur.faces.mediapipe as fb_mediapipe
+import faceblur.faces.model as fb_model
+import faceblur.faces.region as fb_region
+
+
+# Run the CNN on the full frame every N frames
+INTERVAL = 30
+
+MODELS = [
+    fb_model.Model.CASCADE,
+]
+
+
+class CascadeDetector(fb_dlib.DLibDetector):
+    def __init__(self,
+                 confidence=fb_mediapipe.CONFIDENCE,
+                 upscale=fb_dlib.UPSCALE,
+                 roi_interval=INTERVAL,
+                 roi_margin=fb_region.MARGIN,
+                 threads=os.cpu_count()):
+        # Between full frames, the CNN runs only around the faces of its most recent detection
+        # (a full frame scan, or regions where it found any) and around the candidates of the fast detector
+        super().__init__("cnn", upscale, roi_interval, roi_margin, threads)
+
+        # Fast (full range) detector used to find candidates for the CNN
+        self._fast = fb_mediapipe.MediaPipeDetector(1, confidence)
+
+    def detect(self, image):
+        if self._is_full_frame(self._current_frame):
+            regions = None
+        else:
+            # Enlarge the candidates as the fast detector is not as precise.
+            # They may go out of the image, so clip them first
+            self._wait_for_full_frame()
+            candidates = [face.clip() for face in self._fast.detect(image)]
+            regions = self._regions([face for face in candidates if face is not None])
+
+            # Only the candidates of this frame are needed
+            self._fast.clear()
+
+        self._submit(image, regions)
+
+        # next frame
+        self._current_frame += 1
+
+    def close(self):
+        self._fast.close()
+        super().close()
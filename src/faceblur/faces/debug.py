@@ -1,19 +1,23 @@
 # Copyright (C) 2025, Simona Dimitrova
 
+import faceblur.box as fb_box
+import faceblur.faces.table as fb_table
+
 from PIL.Image import Image
 from PIL.ImageDraw import Draw
 
 
 def debug_faces(image: Image, faces):
+    # faces are (original, processed), each a list of Box or a FaceTable (e.g. of a single frame)
     draw = Draw(image)
 
     def _draw(faces, colour, size):
-        for face in faces:
-            # denormalise
-            face = face.denormalise(image.width, image.height)
+        # denormalise
+        boxes = fb_box.denormalise(fb_table.to_array(faces), image.width, image.height)
 
+        for top, right, bottom, left in boxes[fb_box.is_valid(boxes)].tolist():
             # Draw rectangle: Rectangles are (top-left, bottom_right)
-            draw.rectangle([(face.left, face.top), (face.right, face.bottom)], fill=None, outline=colour, width=size)
+            draw.rectangle([(left, top), (right, bottom)], fill=None, outline=colour, width=size)
 
     original_faces, processed_faces = faces
 
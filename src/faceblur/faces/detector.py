@@ -1,14 +1,54 @@
 # Copyright (C) 2025, Simona Dimitrova
 
+import numpy as np
+
+import faceblur.faces.region as fb_region
+import faceblur.faces.table as fb_table
+
+
+# Scan the full frame every N frames and only around the last found faces in between.
+# 0 always scans the full frame
+ROI_INTERVAL = 0
+
+
+def filter_faces(faces, confidence):
+    # confidence is in %. Faces without a score (i.e. model does not provide one) are always kept
+    return [face for face in faces if face.score is None or face.score * 100 >= confidence]
+
+
+def filter_table(table: fb_table.FaceTable, confidence):
+    # Same as filter_faces(), but for a FaceTable. None keeps all faces
+    if confidence is None:
+        return table
+
+    scores = table.scores
+    return table.select(np.isnan(scores) | (scores * 100 >= confidence))
+
+
 class Detector:
-    def __init__(self, detector):
+    def __init__(self, detector, roi_interval=ROI_INTERVAL, roi_margin=fb_region.MARGIN):
         self._detector = detector
         self._faces = []
+        self._roi_interval = roi_interval
+        self._roi_margin = roi_margin
+
+        # (frame number, faces) of the detection the regions are taken from
+        self._last = (-1, [])
 
     @property
     def faces(self):
         return list(self._faces)
 
+    @property
+    def detections(self):
+        # All faces found by the model, regardless of the requested confidence
+        return self.faces
+
+    @property
+    def confidence(self):
+        # Requested confidence (in %) the detections are filtered with, None if the model does not provide scores
+        return None
+
     @property
     def encodings(self):
         return []
@@ -19,8 +59,31 @@ class Detector:
     def __exit__(self, exc_type, exc_val, exc_tb):
         self.close()
 
+    def _last_faces(self):
+        # The most recently found faces
+        return self._last[1]
+
+    def _update_last_faces(self, frame_number, faces, full_frame):
+        # Only from detections that actually ran: full frame scans (even if nothing was found) and regions only if
+        # anything was found there, so that a face missed once is still looked for until the next full frame scan
+        if frame_number >= self._last[0] and (full_frame or faces):
+            self._last = (frame_number, faces)
+
+    def _is_full_frame(self, frame_number):
+        return not self._roi_interval or frame_number % self._roi_interval == 0
+
+    def _regions(self, candidates=[]):
+        # Look only around the last known faces (and any extra candidates),
+        # enlarged to account for motion since then
+        faces = candidates + self._last_faces()
+        return fb_region.merge([fb_region.expand(face, self._roi_margin) for face in faces])
+
     def detect(self, image):
         raise NotImplementedError()
 
+    def clear(self):
+        # Forget the faces found so far, e.g. when only the faces of the current frame are needed
+        self._faces.clear()
+
     def close(self):
         self._detector.close()
@@ -1,13 +1,13 @@
 # Copyright (C) 2025, Simona Dimitrova
 
 import concurrent.futures as cf
-import face_recognition
 import os
 import numpy as np
 
 import faceblur.box as fb_box
 import faceblur.faces.detector as fb_detector
 import faceblur.faces.model as fb_model
+import faceblur.faces.region as fb_region
 
 
 UPSCALE = 1
@@ -18,11 +18,33 @@ MODELS = [
 ]
 
 
-def _process_frame(detector, image, frame_number, upscale):
+def _locate_faces(arr, detector, upscale, regions=None):
+    import face_recognition
+
+    if regions is None:
+        # Whole frame
+        return face_recognition.face_locations(arr, model=detector, number_of_times_to_upsample=upscale)
+
+    faces = []
+    for region in regions:
+        cropped, region = fb_region.crop(arr, region)
+
+        # Detect faces in the region only and offset them back into the frame
+        for top, right, bottom, left in face_recognition.face_locations(
+                cropped, model=detector, number_of_times_to_upsample=upscale):
+            faces.append((top + region.top, right + region.left, bottom + region.top, left + region.left))
+
+    return faces
+
+
+def _process_frame(detector, image, frame_number, upscale, regions=None):
+    # Import here (i.e. in the workers) so that dlib is loaded only when actually used
+    import face_recognition
+
     arr = np.asarray(image)
 
     # Detect faces
-    faces = face_recognition.face_locations(arr, model=detector, number_of_times_to_upsample=upscale)
+    faces = _locate_faces(arr, detector, upscale, regions)
 
     # Compute unique face encodings
     encodings = face_recognition.face_encodings(arr, faces, model="large")
@@ -34,36 +56,70 @@ def _process_frame(detector, image, frame_number, upscale):
 
 
 class DLibDetector(fb_detector.Detector):
-    def __init__(self, model, upscale=UPSCALE, threads=os.cpu_count()):
-        super().__init__(model)
+    def __init__(self, model, upscale=UPSCALE,
+                 roi_interval=fb_detector.ROI_INTERVAL,
+                 roi_margin=fb_region.MARGIN,
+                 threads=os.cpu_count()):
+        super().__init__(model, roi_interval, roi_margin)
         self._upscale = upscale
         self._threads = threads
         self._executor = cf.ProcessPoolExecutor(max_workers=threads)
-        self._futures = set()
+
+        # future -> frame number
+        self._futures = {}
+        self._last_full_frame = None
         self._faces = {}
         self._encodings = {}
         self._current_frame = 0
 
-    def _process_done(self, done: set[cf.Future]):
-        for future in done:
+    def _process_done(self, done):
+        for future in list(done):
             current_frame, faces, encodings = future.result()
             self._faces[current_frame] = faces
             self._encodings[current_frame] = encodings
 
-        self._futures -= done
+            # Detection runs in the background, so the regions come from the finished frames
+            self._update_last_faces(current_frame, faces, self._is_full_frame(current_frame))
+
+            del self._futures[future]
+
+    def _wait_for_full_frame(self):
+        # Regions must come at least from the last full frame scan, even if it has not finished yet
+        if self._last_full_frame is not None:
+            self._process_done([future for future, frame in self._futures.items() if frame <= self._last_full_frame])
+
+    def _submit(self, image, regions=None):
+        if regions == []:
+            # Nothing to look at, no need to bother the workers (and not a detection to take regions from)
+            self._faces[self._current_frame] = []
+            self._encodings[self._current_frame] = []
+            return
 
-    def detect(self, image):
         # Do not pile up more work until there are enough free workers
         while len(self._futures) >= self._threads:
             # wait for one
             self._process_done(cf.wait(self._futures, return_when=cf.FIRST_COMPLETED).done)
 
+        if regions is None:
+            self._last_full_frame = self._current_frame
+
         # queue up work
-        self._futures.add(self._executor.submit(_process_frame,
-                                                self._detector,
-                                                image,
-                                                self._current_frame,
-                                                self._upscale))
+        future = self._executor.submit(_process_frame,
+                                       self._detector,
+                                       image,
+                                       self._current_frame,
+                                       self._upscale,
+                                       regions)
+        self._futures[future] = self._current_frame
+
+    def detect(self, image):
+        if self._is_full_frame(self._current_frame):
+            regions = None
+        else:
+            self._wait_for_full_frame()
+            regions = self._regions()
+
+        self._submit(image, regions)
 
         # next frame
         self._current_frame += 1
@@ -4,20 +4,16 @@ import av.error
 import tqdm
 
 import faceblur.av.container as fb_container
-import faceblur.faces.dlib as fb_dlib
-import faceblur.faces.mediapipe as fb_mediapipe
 import faceblur.faces.model as fb_model
+import faceblur.faces.registry as fb_registry
+import faceblur.faces.table as fb_table
 import faceblur.threading as fb_threading
 
 from PIL.Image import Image
 
 
-DETECTORS = {
-    fb_model.Model.MEDIA_PIPE_SHORT_RANGE: lambda options: fb_mediapipe.MediaPipeDetector(0, **options),
-    fb_model.Model.MEDIA_PIPE_FULL_RANGE: lambda options: fb_mediapipe.MediaPipeDetector(1, **options),
-    fb_model.Model.DLIB_HOG: lambda options: fb_dlib.DLibDetector("hog", **options),
-    fb_model.Model.DLIB_CNN: lambda options: fb_dlib.DLibDetector("cnn", **options),
-}
+# Detector backends are only imported once their model is selected
+DETECTORS = fb_registry.DETECTORS
 
 
 def identify_faces_from_video(container: fb_container.InputContainer,
@@ -30,7 +26,8 @@ def identify_faces_from_video(container: fb_container.InputContainer,
     frame_rate = {stream: stream._stream.guessed_rate for stream in container.streams if stream.type == "video"}
 
     # A detector for each face
-    detectors = {stream: DETECTORS[model](model_options) for stream in container.streams if stream.type == "video"}
+    detectors = {stream: DETECTORS.create(model, model_options)
+                 for stream in container.streams if stream.type == "video"}
 
     try:
         with progress(desc="Detecting faces", total=container.video.frames, unit=" frames", leave=False) as progress:
@@ -52,9 +49,10 @@ def identify_faces_from_video(container: fb_container.InputContainer,
                         # Drop the packet
                         pass
 
-        # now get the faces from all streams/detectors
-        faces = {stream.index: (detector.faces, detector.encodings,
-                                frame_rate[stream]) for stream, detector in detectors.items()}
+        # now get the faces from all streams/detectors. All detections are kept with their scores,
+        # so that they can be filtered again with another confidence without running the model
+        faces = {stream.index: (fb_table.FaceTable.from_frames(detector.detections, detector.encodings),
+                                frame_rate[stream], detector.confidence) for stream, detector in detectors.items()}
 
     finally:
         for detector in detectors.values():
@@ -67,6 +65,6 @@ def identify_faces_from_image(image: Image,
                               model=fb_model.DEFAULT,
                               model_options={}):
 
-    with DETECTORS[model](model_options) as detector:
+    with DETECTORS.create(model, model_options) as detector:
         detector.detect(image)
         return detector.faces[0]
@@ -0,0 +1,106 @@
+# Copyright (C) 2025, Simona Dimitrova
+
+import numpy as np
+
+
+# Random projection (p-stable) locality sensitive hashing for euclidean distances.
+# Each table hashes a vector into a bucket by quantising PROJECTIONS random projections of it,
+# so that close vectors are likely to end up in the same bucket in at least one of the TABLES.
+TABLES = 8
+PROJECTIONS = 4
+
+# Width of the quantisation bins relative to the max distance of interest.
+# Wider bins find more of the close vectors, but put more of the far ones in the same buckets too
+WIDTH = 4
+
+# Number of cells on each side of the (normalised) image for the spatial index
+GRID = 16
+
+
+class Index:
+    def __init__(self):
+        # bucket -> keys
+        self._buckets = {}
+
+        # key -> buckets it is in
+        self._keys = {}
+
+    def __len__(self):
+        return len(self._keys)
+
+    def _hash(self, vectors):
+        # N vectors -> the buckets for each of them
+        raise NotImplementedError()
+
+    def remove(self, key):
+        for bucket in self._keys.pop(key):
+            keys = self._buckets[bucket]
+            keys.discard(key)
+            if not keys:
+                del self._buckets[bucket]
+
+    def update(self, keys, vectors):
+        # Insert new keys or move existing ones if their vectors have changed
+        for key, buckets in zip(keys, self._hash(vectors)):
+            if self._keys.get(key) == buckets:
+                continue
+
+            if key in self._keys:
+                self.remove(key)
+
+            self._keys[key] = buckets
+            for bucket in buckets:
+                self._buckets.setdefault(bucket, set()).add(key)
+
+    def clear(self):
+        self._buckets = {}
+        self._keys = {}
+
+    def query(self, vectors):
+        # Candidate keys for each vector, i.e. keys sharing a bucket with it.
+        # They still need to be checked against the actual score
+        results = []
+
+        for buckets in self._hash(vectors):
+            candidates = set()
+            for bucket in buckets:
+                candidates.update(self._buckets.get(bucket, ()))
+
+            results.append(sorted(candidates))
+
+        return results
+
+
+class LshIndex(Index):
+    def __init__(self, dimensions, max_distance, tables=TABLES, projections=PROJECTIONS, width=WIDTH, seed=0):
+        super().__init__()
+
+        rng = np.random.default_rng(seed)
+
+        self._width = max_distance * width
+        self._projections = rng.normal(size=(dimensions, tables * projections)).astype(np.float32)
+        self._offsets = rng.uniform(0, self._width, size=tables * projections).astype(np.float32)
+        self._tables = tables
+
+    def _hash(self, vectors):
+        # A bucket in each table
+        bins = np.floor((vectors @ self._projections + self._offsets) / self._width).astype(np.int64)
+        bins = bins.reshape(len(vectors), self._tables, -1)
+        return [[(table, hash(tuple(b))) for table, b in enumerate(vector)] for vector in bins.tolist()]
+
+
+class GridIndex(Index):
+    # Uniform grid over the normalised image. Boxes are in all cells they overlap,
+    # so boxes that intersect always share a cell, i.e. no intersecting boxes are missed
+    def __init__(self, cells=GRID):
+        super().__init__()
+        self._cells = cells
+
+    def _hash(self, boxes):
+        # (top, right, bottom, left, ...) -> cell ranges (anything outside of the image goes into the border cells)
+        ranges = np.clip(np.floor(np.asarray(boxes)[:, :4] * self._cells), 0, self._cells - 1).astype(np.int64)
+
+        return [
+            [row * self._cells + col for row in range(top, bottom + 1) for col in range(left, right + 1)]
+            for top, right, bottom, left in ranges.tolist()
+        ]
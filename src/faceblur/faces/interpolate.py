@@ -1,53 +1,83 @@
 # Copyright (C) 2025, Simona Dimitrova
 
-import copy
 import numpy as np
 
 import faceblur.box as fb_box
+import faceblur.faces.table as fb_table
 
 
 TRACKING_MAX_FRAME_DISTANCE = 30
 
 
 def _interpolate(a, b, t):
-    return a + (b - a) * t
+    # Arrays of boxes (..., 4) and positions between them (...)
+    return a + (b - a) * t[..., None]
 
 
-def _interpolate_boxes(box1, box2, t):
-    return fb_box.Box(
-        _interpolate(box1.top, box2.top, t),
-        _interpolate(box1.right, box2.right, t),
-        _interpolate(box1.bottom, box2.bottom, t),
-        _interpolate(box1.left, box2.left, t)
-    )
+def _to_boxes(arr):
+    return [fb_box.Box(*box) for box in arr.tolist()]
+
+
+def interpolate_boxes(box1, box2, count):
+    # count boxes evenly spaced between box1 and box2 (both excluded)
+    t = np.arange(1, count + 1) / (count + 1)
+    return _to_boxes(_interpolate(fb_box.to_array([box1]), fb_box.to_array([box2]), t))
+
+
+def interpolate_table(table: fb_table.FaceTable, tracking_max_frame_distance=TRACKING_MAX_FRAME_DISTANCE,
+                      first_boxes=None):
+    # Returns a table with the missing faces of each track added after the faces found in each frame.
+    # Tracks start with their first box one frame before the video (by default the first face of the track)
+    frame_indices = table.frames
+    track_indices = table.tracks
+    boxes = table.boxes
+
+    # Consecutive faces of each track, i.e. the gaps between them
+    order = np.lexsort((frame_indices, track_indices))
+    first = np.ones(len(order), dtype=bool)
+    first[1:] = track_indices[order[1:]] != track_indices[order[:-1]]
+
+    previous = np.roll(order, 1)
+
+    if first_boxes is None:
+        first_boxes = np.empty((track_indices.max(initial=-1) + 1, 4))
+        first_boxes[track_indices[order[first]]] = boxes[order[first]]
+
+    # i.e. faces found in the first frames are interpolated back to the start of the video
+    previous_frames = np.where(first, -1, frame_indices[previous])
+    previous_boxes = np.where(first[:, None], first_boxes[track_indices[order]], boxes[previous])
+
+    # Only gaps that were tracked
+    distances = frame_indices[order] - previous_frames
+    gaps = np.nonzero((1 < distances) & (distances < tracking_max_frame_distance))[0]
+
+    # All missing faces at once: for each gap, one face in each frame between
+    counts = distances[gaps] - 1
+    gap_of_face = np.repeat(gaps, counts)
+    offsets = np.arange(len(gap_of_face)) - np.repeat(np.cumsum(counts) - counts, counts)
+
+    new_frames = previous_frames[gap_of_face] + 1 + offsets
+    new_boxes = _interpolate(previous_boxes[gap_of_face], boxes[order[gap_of_face]],
+                             (offsets + 1) / distances[gap_of_face])
+
+    # Missing faces go after the ones found in the frame, in order of the later face of the gap
+    frames = np.concatenate((frame_indices, new_frames))
+    missing = np.arange(len(frames)) >= len(table)
+    later_faces = np.concatenate((np.arange(len(table)), order[gap_of_face]))
+    rows = np.lexsort((later_faces, missing, frames))
+
+    return fb_table.FaceTable(
+        table.frame_count,
+        frames[rows],
+        np.concatenate((boxes, new_boxes))[rows],
+        np.concatenate((table.scores, np.full(len(new_frames), np.nan)))[rows],
+        np.concatenate((track_indices, track_indices[order[gap_of_face]]))[rows])
 
 
 def interpolate_faces(tracks, frames_with_tracks, tracking_max_frame_distance=TRACKING_MAX_FRAME_DISTANCE):
-    # Make sure to make a deep copy as we are going to be modifying the lists in place
-    frames = copy.deepcopy(frames_with_tracks)
-
-    previous_faces = [
-        (-1, track[0]) for track in tracks
-    ]
-
-    for frame in range(len(frames)):
-        faces_in_frame = frames[frame]
-        for face, track_index in faces_in_frame:
-            # When was it last shown?
-            previous_frame, previous_face = previous_faces[track_index]
-            frame_distance = frame - previous_frame
-            if 1 < frame_distance < tracking_max_frame_distance:
-                frames_to_interpolate = frame_distance - 1
-
-                # interpolate back
-                for offset, dt in enumerate(np.linspace(0, 1, frames_to_interpolate + 2)[1:-1]):
-                    new_face = _interpolate_boxes(previous_face, face, dt)
-                    frame_to_fix = frames[previous_frame + 1 + offset]
-                    frame_to_fix.append(new_face)
-
-            previous_faces[track_index] = (frame, face)
-
-        # Now fix this frame
-        frames[frame] = [face for face, track_index in faces_in_frame]
-
-    return frames
+    table = fb_table.FaceTable.from_frames([[face for face, track_index in frame] for frame in frames_with_tracks])
+    table = table.with_tracks([track_index for frame in frames_with_tracks for face, track_index in frame])
+
+    first_boxes = fb_box.to_array([track[0] for track in tracks])
+
+    return interpolate_table(table, tracking_max_frame_distance, first_boxes).to_frames()
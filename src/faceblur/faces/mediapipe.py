@@ -5,12 +5,15 @@ import numpy as np
 import faceblur.box as fb_box
 import faceblur.faces.detector as fb_detector
 import faceblur.faces.model as fb_model
-
-from mediapipe.python.solutions.face_detection import FaceDetection
+import faceblur.faces.region as fb_region
 
 
 CONFIDENCE = 50
 
+# The model always runs with this confidence and the requested one is applied afterwards.
+# This keeps the scores of all faces, so that they can be filtered again without running the model
+MIN_CONFIDENCE = 10
+
 MODELS = [
     fb_model.Model.MEDIA_PIPE_SHORT_RANGE,
     fb_model.Model.MEDIA_PIPE_FULL_RANGE,
@@ -18,13 +21,34 @@ MODELS = [
 
 
 class MediaPipeDetector(fb_detector.Detector):
-    def __init__(self, model, confidence=CONFIDENCE):
-        super().__init__(FaceDetection(min_detection_confidence=confidence/100, model_selection=model))
+    def __init__(self, model, confidence=CONFIDENCE,
+                 roi_interval=fb_detector.ROI_INTERVAL,
+                 roi_margin=fb_region.MARGIN):
+        # Import here so that mediapipe (and TensorFlow Lite) are loaded only when actually used
+        from mediapipe.python.solutions.face_detection import FaceDetection
 
-    def detect(self, image):
+        super().__init__(FaceDetection(min_detection_confidence=min(confidence, MIN_CONFIDENCE)/100,
+                                       model_selection=model),
+                         roi_interval, roi_margin)
+        self._confidence = confidence
+        self._current_frame = 0
+
+    @property
+    def faces(self):
+        return [fb_detector.filter_faces(faces, self._confidence) for faces in self._faces]
+
+    @property
+    def detections(self):
+        return list(self._faces)
+
+    @property
+    def confidence(self):
+        return self._confidence
+
+    def _process(self, arr):
         faces = []
 
-        results = self._detector.process(np.asarray(image))
+        results = self._detector.process(arr)
         if results.detections:
             for detection in results.detections:
                 box = detection.location_data.relative_bounding_box
@@ -36,8 +60,28 @@ class MediaPipeDetector(fb_detector.Detector):
                 bottom = box.ymin + box.height
 
                 # Make sure the face box is within the image as detection may return coords out of bounds
-                face = fb_box.Box(top, right, bottom, left)
+                face = fb_box.Box(top, right, bottom, left, detection.score[0])
                 faces.append(face)
 
-        self._faces.append(faces)
         return faces
+
+    def detect(self, image):
+        arr = np.asarray(image)
+
+        full_frame = self._is_full_frame(self._current_frame)
+        if full_frame:
+            faces = self._process(arr)
+        else:
+            faces = []
+            for region in self._regions():
+                # Detect in the region only and map back to the whole image
+                cropped, region = fb_region.crop(arr, region)
+                faces += [fb_region.from_crop(face, region, image.width, image.height)
+                          for face in self._process(cropped)]
+
+        found = fb_detector.filter_faces(faces, self._confidence)
+        self._update_last_faces(self._current_frame, found, full_frame)
+
+        self._faces.append(faces)
+        self._current_frame += 1
+        return found
@@ -6,6 +6,8 @@ from enum import StrEnum
 class Mode(StrEnum):
     RECT_BLUR = "RECT_BLUR"
     GRACEFUL_BLUR = "GRACEFUL_BLUR"
+    PIXELATE = "PIXELATE"
+    SOLID = "SOLID"
     DEBUG = "DEBUG"
 
 
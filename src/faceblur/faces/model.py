@@ -22,5 +22,8 @@ class Model(StrEnum):
     # CNN (slow and accurate) model
     DLIB_CNN = "DLIB_CNN"
 
+    # MediaPipe (fast) finds candidate regions, DLIB CNN (slow and accurate) runs only on them
+    CASCADE = "CASCADE"
+
 
 DEFAULT = Model.MEDIA_PIPE_FULL_RANGE
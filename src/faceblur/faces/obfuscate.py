@@ -1,8 +1,29 @@
 # Copyright (C) 2025, Simona Dimitrova
 
+import collections
+import concurrent.futures
+import contextlib
+import functools
+import math
+import numpy as np
+import threading
+
+import faceblur.box as fb_box
 import faceblur.faces.mode as fb_mode
+import faceblur.faces.table as fb_table
+
+from enum import StrEnum
+from PIL import Image, ImageColor, ImageFilter, ImageDraw, ImageChops
+
+
+class Backend(StrEnum):
+    # PIL: crops, blurs and pastes back PIL images.
+    # NUMPY: obfuscates in place the pixels of the frame as an ndarray, without creating new images
+    PIL = "PIL"
+    NUMPY = "NUMPY"
+
 
-from PIL import Image, ImageFilter, ImageDraw, ImageChops
+DEFAULT_BACKEND = Backend.PIL
 
 
 MIN_FILTER_SIZE = 4
@@ -10,74 +31,352 @@ MAX_FILTER_SIZE = 1024
 FACE_FILTER_DIVISOR = 20
 STRENGTH = 100
 
+# Blur at a reduced scale when the radius is bigger than this, so that the blur works on fewer pixels.
+# The detail lost from scaling down would be blurred away anyway
+FAST_BLUR_RADIUS = 8
 
-def _calculate_filter_size(face, strength=STRENGTH):
-    return tuple(
-        max(MIN_FILTER_SIZE, min(MAX_FILTER_SIZE, int(round(f / FACE_FILTER_DIVISOR) * (strength / 100))))
-        for f in (face.width, face.height)
-    )
+# How many feathered masks to keep and how close (in pixels) face sizes must be to share one
+MASK_CACHE_SIZE = 64
+MASK_QUANTISATION = 4
 
+# Reusing the blurred faces of previous frames (for up to PATCH_REUSE frames, 0 never reuses them), as long as
+# the face box has not moved by more than PATCH_TOLERANCE pixels and the pixels of the face have changed by less than
+# PATCH_MAX_DIFFERENCE on average (0-255, compared at PATCH_FINGERPRINT x PATCH_FINGERPRINT)
+PATCH_REUSE = 0
+PATCH_TOLERANCE = 2
+PATCH_MAX_DIFFERENCE = 2
+PATCH_FINGERPRINT = 16
 
-def blur_faces_rect(image: Image.Image, faces, strength):
-    for face in faces:
-        # denormalise
-        face = face.denormalise(image.width, image.height)
+# Number of blocks across a face when pixelating at 100% strength
+PIXELATE_BLOCKS = 10
+SOLID_COLOUR = "black"
 
-        # Crop the face region
-        face_image = image.crop((face.left, face.top, face.right, face.bottom))
 
-        # Calculate blur strength
-        radius = _calculate_filter_size(face, strength)
+def _calculate_filter_sizes(boxes, strength=STRENGTH):
+    # N x 4 boxes in pixels -> N x 2 (x, y) filter sizes
+    sizes = np.stack((boxes[:, 1] - boxes[:, 3], boxes[:, 2] - boxes[:, 0]), axis=1)
+    sizes = (np.round(sizes / FACE_FILTER_DIVISOR) * (strength / 100)).astype(np.int64)
+    return np.clip(sizes, MIN_FILTER_SIZE, MAX_FILTER_SIZE)
 
-        # Apply a Gaussian blur to the cropped region
-        blurred_face_image = face_image.filter(ImageFilter.GaussianBlur(radius=radius))
 
-        # Paste the blurred region back onto the image
-        image.paste(blurred_face_image, (face.left, face.top, face.right, face.bottom))
+def _calculate_block_sizes(boxes, strength=STRENGTH):
+    # N x 4 boxes in pixels -> N x 2 (x, y) pixelation block sizes
+    sizes = np.stack((boxes[:, 1] - boxes[:, 3], boxes[:, 2] - boxes[:, 0]), axis=1)
+    sizes = np.round(sizes / PIXELATE_BLOCKS * (strength / 100)).astype(np.int64)
+    return np.maximum(sizes, 1)
+
+
+def _blur(image: Image.Image, radius, filter=ImageFilter.GaussianBlur):
+    # radius is (x, y)
+    radius_x, radius_y = radius
+    if max(radius) <= FAST_BLUR_RADIUS:
+        return image.filter(filter(radius=radius))
+
+    # Scale down so that the radius is FAST_BLUR_RADIUS, blur and scale back up.
+    # The cost no longer depends on the radius, only on the size of the image
+    size = (
+        max(1, round(image.width * FAST_BLUR_RADIUS / max(radius_x, FAST_BLUR_RADIUS))),
+        max(1, round(image.height * FAST_BLUR_RADIUS / max(radius_y, FAST_BLUR_RADIUS))))
+
+    scaled_radius = (radius_x * size[0] / image.width, radius_y * size[1] / image.height)
+
+    blurred = image.resize(size, Image.Resampling.BOX).filter(filter(radius=scaled_radius))
+    return blurred.resize(image.size, Image.Resampling.BILINEAR)
+
+
+def _create_mask(width, height, radius):
+    # Expanded dimensions for the feather effect of the oval mask
+    r_x, r_y = radius
+    width_expanded, height_expanded = width + 2 * r_x, height + 2 * r_y
+
+    # Create an oval image mask for the face region
+    mask = Image.new("L", (width_expanded, height_expanded), 0)
+
+    # Draw a solid ellipse in the mask (account for blur radius)
+    draw = ImageDraw.Draw(mask)
+    draw.ellipse((r_x, r_y, r_x + width, r_y + height), fill=255)
+
+    # Blur the mask to create a gradial effect
+    return _blur(mask, radius, ImageFilter.BoxBlur)
+
+
+CacheInfo = collections.namedtuple("CacheInfo", ["hits", "misses", "maxsize", "currsize"])
+
+
+class MaskCache:
+    # Least recently used masks for GRACEFUL_BLUR. Faces of about the same size (e.g. the same face
+    # in the next frame) get the same mask, scaled to their size
+    def __init__(self, maxsize=MASK_CACHE_SIZE, quantisation=MASK_QUANTISATION):
+        self._masks = collections.OrderedDict()
+        self._maxsize = maxsize
+        self._quantisation = quantisation
+        self._hits = 0
+        self._misses = 0
+
+        # Faces may be obfuscated on several threads
+        self._lock = threading.Lock()
+
+    def get(self, width, height, radius):
+        key = (width // self._quantisation, height // self._quantisation, radius)
+        size = (width + 2 * radius[0], height + 2 * radius[1])
+
+        with self._lock:
+            mask = self._masks.get(key)
+            if mask is not None:
+                self._hits += 1
+                self._masks.move_to_end(key)
+            else:
+                self._misses += 1
+
+        if mask is None:
+            mask = _create_mask(width, height, radius)
+
+            with self._lock:
+                self._masks[key] = mask
+                if len(self._masks) > self._maxsize:
+                    self._masks.popitem(last=False)
+
+            return mask
+
+        return mask if mask.size == size else mask.resize(size, Image.Resampling.BILINEAR)
+
+    def cache_info(self):
+        # Same as for functools.lru_cache()
+        return CacheInfo(self._hits, self._misses, self._maxsize, len(self._masks))
+
+    def cache_clear(self):
+        with self._lock:
+            self._masks.clear()
+            self._hits = 0
+            self._misses = 0
+
+
+MASKS = MaskCache()
+
+
+class PatchCache:
+    # Blurred regions of single tracked faces, reused in the following frames while the face box and the pixels
+    # under it do not change (e.g. a seated speaker filmed with a fixed camera)
+    def __init__(self, max_age=PATCH_REUSE, tolerance=PATCH_TOLERANCE, max_difference=PATCH_MAX_DIFFERENCE):
+        self._max_age = max_age
+        self._tolerance = tolerance
+        self._max_difference = max_difference
+
+        # track index -> (region, fingerprint, (patch, position, mask), frame it was blurred in)
+        self._patches = {}
+        self._frame = 0
+
+        # Regions of the same frame are blurred in several threads
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def next_frame(self):
+        # Called once for every frame of the stream, whether it has faces or not
+        self._frame += 1
+
+        # Forget the tracks that could no longer be reused
+        for track_index in [t for t, patch in self._patches.items() if self._frame - patch[3] > self._max_age]:
+            del self._patches[track_index]
+
+    def _fingerprint(self, image: Image.Image, region):
+        top, right, bottom, left = region
+        fingerprint = image.crop((left, top, right, bottom)).resize(
+            (PATCH_FINGERPRINT, PATCH_FINGERPRINT), Image.Resampling.BOX)
+        return np.asarray(fingerprint, dtype=np.int16)
+
+    def blur(self, image: Image.Image, region, track_index, blur):
+        # Runs blur() only if the patch for the track can't be reused.
+        # Each track is only in a single region, so only the counters need locking between threads
+        fingerprint = self._fingerprint(image, region)
+
+        cached = self._patches.get(track_index)
+        if cached is not None:
+            cached_region, cached_fingerprint, patch, frame = cached
+            if (self._frame - frame <= self._max_age
+                    and max(abs(a - b) for a, b in zip(region, cached_region)) <= self._tolerance
+                    and np.abs(fingerprint - cached_fingerprint).mean() <= self._max_difference):
+                with self._lock:
+                    self._hits += 1
+                return patch
+
+        with self._lock:
+            self._misses += 1
+
+        patch = blur()
+        self._patches[track_index] = (region, fingerprint, patch, self._frame)
+
+        return patch
+
+    def cache_info(self):
+        return CacheInfo(self._hits, self._misses, self._max_age, len(self._patches))
+
+
+def _denormalise(faces, width, height):
+    # Faces as N x 4 boxes in pixels and their track indices (-1 if not tracked),
+    # leaving out the ones outside of the image
+    boxes = fb_box.denormalise(fb_table.to_array(faces), width, height)
+    tracks = faces.tracks if isinstance(faces, fb_table.FaceTable) else np.full(len(boxes), -1)
+
+    valid = fb_box.is_valid(boxes)
+    return boxes[valid], tracks[valid]
+
+
+def _plan(boxes):
+    # Cluster intersecting boxes until the bounding regions of the clusters are disjoint,
+    # so that each pixel is blurred (and pasted) only once. -> [(region, indices of the boxes in it)]
+    regions = []
+
+    for index, region in enumerate(boxes.tolist()):
+        indices = [index]
+
+        while True:
+            for position, (other, other_indices) in enumerate(regions):
+                if region[0] <= other[2] and other[0] <= region[2] and region[3] <= other[1] and other[3] <= region[1]:
+                    # Absorb it and check again as the union is bigger
+                    region = fb_box.union(np.array(region), np.array(other)).tolist()
+                    indices += other_indices
+                    del regions[position]
+                    break
+            else:
+                break
+
+        regions.append((region, sorted(indices)))
+
+    return regions
+
+
+def _reuse(image: Image.Image, task, region, tracks, cache=None):
+    # Only regions of a single tracked face can be reused
+    if cache is None or len(tracks) != 1 or tracks[0] < 0:
+        return task
+
+    return functools.partial(cache.blur, image, region, tracks[0].item(), task)
+
+
+def _paste(image: Image.Image, tasks, executor=None):
+    # Each task crops a region of the image and returns what to paste back: (patch, position, mask).
+    # The regions are disjoint, so the tasks can run at the same time (PIL releases the GIL while filtering),
+    # pasting only once all of them are done
+    if executor is not None and len(tasks) > 1:
+        results = list(executor.map(lambda task: task(), tasks))
+    else:
+        results = [task() for task in tasks]
+
+    for patch, position, mask in results:
+        image.paste(patch, position, mask)
 
     return image
 
 
-def blur_faces_graceful(image: Image.Image, faces, strength):
-    for face in faces:
-        # Denormalise
-        face = face.denormalise(image.width, image.height)
+def _blur_rect_region(image: Image.Image, region, boxes, radius):
+    top, right, bottom, left = region
 
-        # Calculate blur strength
-        radius = _calculate_filter_size(face, strength)
+    # Crop the region of the overlapping faces
+    region_image = image.crop((left, top, right, bottom))
 
-        # Original dimentions of the face
-        width, height = face.width, face.height
+    # Apply a Gaussian blur to the cropped region (as strong as for the biggest face)
+    blurred_region_image = _blur(region_image, radius)
 
-        # Expanded dimensions for the feather effect of the oval mask
-        r_x, r_y = radius
-        width_expanded, height_expanded = width + 2 * r_x, height + 2 * r_y
+    if len(boxes) == 1:
+        # Paste the blurred region back onto the image
+        return blurred_region_image, (left, top, right, bottom), None
 
-        # Create an oval image mask for the face region
-        mask = Image.new("L", (width_expanded, height_expanded), 0)
+    # Paste back only the faces, i.e. not the corners of the region
+    mask = Image.new("L", region_image.size, 0)
+    draw = ImageDraw.Draw(mask)
+    for face_top, face_right, face_bottom, face_left in boxes.tolist():
+        draw.rectangle((face_left - left, face_top - top, face_right - left - 1, face_bottom - top - 1), fill=255)
 
-        # Draw a solid ellipse in the mask (account for blur radius)
-        draw = ImageDraw.Draw(mask)
-        draw.ellipse((r_x, r_y, r_x + width, r_y + height), fill=255)
+    return blurred_region_image, (left, top), mask
 
-        # Blur the mask to create a gradial effect
-        mask = mask.filter(ImageFilter.BoxBlur(radius=radius))
 
-        # Extract and blur the corresponding face area in the image
-        # TODO: Do we need to blur the entire frame first in order to account
-        # for gaussian effect being bigger than the blur radius
-        face_image = image.crop((
-            face.left - r_x,
-            face.top - r_y,
-            face.right + r_x,
-            face.bottom + r_y
-        ))
+def blur_faces_rect(image: Image.Image, faces, strength, executor=None, cache=None):
+    boxes, tracks = _denormalise(faces, image.width, image.height)
 
-        blurred_face_image = face_image.filter(ImageFilter.GaussianBlur(radius=radius))
+    # Calculate blur strength
+    radii = _calculate_filter_sizes(boxes, strength)
 
-        # Composite the blurred face on the original image using the oval mask
-        masked_blurred_faces = Image.composite(blurred_face_image, face_image, mask)
-        image.paste(masked_blurred_faces, (face.left - r_x, face.top - r_y))
+    return _paste(image, [
+        _reuse(image, functools.partial(
+            _blur_rect_region, image, region, boxes[indices], tuple(radii[indices].max(axis=0).tolist())),
+            region, tracks[indices], cache)
+        for region, indices in _plan(boxes)], executor)
+
+
+def _blur_graceful_region(image: Image.Image, region, boxes, radii):
+    top, right, bottom, left = region
+
+    # Extract and blur the corresponding area in the image (as strong as for the biggest face)
+    # TODO: Do we need to blur the entire frame first in order to account
+    # for gaussian effect being bigger than the blur radius
+    region_image = image.crop((left, top, right, bottom))
+    blurred_region_image = _blur(region_image, tuple(radii.max(axis=0).tolist()))
+
+    # Oval masks for the faces in the region, expanded for the feather effect
+    if len(boxes) == 1:
+        face_top, face_right, face_bottom, face_left = boxes[0].tolist()
+        mask = MASKS.get(face_right - face_left, face_bottom - face_top, tuple(radii[0].tolist()))
+    else:
+        # Combine the masks of all faces, i.e. the most opaque one at each pixel
+        mask = np.zeros((region_image.height, region_image.width), dtype=np.uint8)
+        for (face_top, face_right, face_bottom, face_left), (r_x, r_y) in zip(boxes.tolist(), radii.tolist()):
+            face_mask = np.asarray(MASKS.get(face_right - face_left, face_bottom - face_top, (r_x, r_y)))
+
+            y, x = face_top - r_y - top, face_left - r_x - left
+            area = mask[y:y + face_mask.shape[0], x:x + face_mask.shape[1]]
+            np.maximum(area, face_mask, out=area)
+
+        mask = Image.fromarray(mask)
+
+    # Composite the blurred faces on the original image using the oval masks
+    return blurred_region_image, (left, top), mask
+
+
+def blur_faces_graceful(image: Image.Image, faces, strength, executor=None, cache=None):
+    boxes, tracks = _denormalise(faces, image.width, image.height)
+
+    # Calculate blur strength
+    radii = _calculate_filter_sizes(boxes, strength)
+
+    # Face areas expanded for the feather effect of the oval masks
+    expanded = boxes + np.stack((-radii[:, 1], radii[:, 0], radii[:, 1], -radii[:, 0]), axis=1)
+
+    return _paste(image, [
+        _reuse(image, functools.partial(_blur_graceful_region, image, region, boxes[indices], radii[indices]),
+               region, tracks[indices], cache)
+        for region, indices in _plan(expanded)], executor)
+
+
+def pixelate_faces(image: Image.Image, faces, strength, executor=None, cache=None):
+    boxes, tracks = _denormalise(faces, image.width, image.height)
+
+    # Calculate block sizes
+    blocks = _calculate_block_sizes(boxes, strength)
+
+    for (top, right, bottom, left), (block_x, block_y) in zip(boxes.tolist(), blocks.tolist()):
+        face_image = image.crop((left, top, right, bottom))
+        if not face_image.width or not face_image.height:
+            continue
+
+        # Average each block, then scale it back up without smoothing.
+        # The cost depends only on the size of the face
+        small = (max(1, -(-face_image.width // block_x)), max(1, -(-face_image.height // block_y)))
+        pixelated_face_image = face_image.resize(small, Image.Resampling.BOX).resize(
+            face_image.size, Image.Resampling.NEAREST)
+
+        image.paste(pixelated_face_image, (left, top, right, bottom))
+
+    return image
+
+
+def fill_faces(image: Image.Image, faces, strength, executor=None, cache=None):
+    # Strength makes no difference: the faces are completely covered
+    draw = ImageDraw.Draw(image)
+
+    boxes, tracks = _denormalise(faces, image.width, image.height)
+    for top, right, bottom, left in boxes.tolist():
+        draw.rectangle((left, top, right, bottom), fill=SOLID_COLOUR)
 
     return image
 
@@ -85,11 +384,272 @@ def blur_faces_graceful(image: Image.Image, faces, strength):
 MODES = {
     fb_mode.Mode.RECT_BLUR: blur_faces_rect,
     fb_mode.Mode.GRACEFUL_BLUR: blur_faces_graceful,
+    fb_mode.Mode.PIXELATE: pixelate_faces,
+    fb_mode.Mode.SOLID: fill_faces,
+}
+
+
+class _Scratch(threading.local):
+    # Float buffers for blurring, one set per thread, grown as needed and reused for all faces and frames
+    def __init__(self):
+        self._buffers = {}
+
+    def get(self, name, shape):
+        size = math.prod(shape)
+        buffer = self._buffers.get(name)
+        if buffer is None or buffer.size < size:
+            buffer = self._buffers[name] = np.empty(size, dtype=np.float32)
+
+        return buffer[:size].reshape(shape)
+
+
+_SCRATCH = _Scratch()
+
+
+def _box_radius(radius, passes=3):
+    # Same as PIL: the (fractional) radius of the box blurs that approximate a gaussian blur in that many passes
+    sigma2 = radius * radius / passes
+    whole = math.floor((math.sqrt(12 * sigma2 + 1) - 1) / 2)
+    fraction = (2 * whole + 1) * (whole * (whole + 1) - 3 * sigma2) / (6 * (sigma2 - (whole + 1) * (whole + 1)))
+    return whole, fraction
+
+
+def _box_blur(data, radius, fraction):
+    # Box blur in place along the first axis with edge pixels extended.
+    # The cost does not depend on the radius: each pixel is the difference of two running sums
+    length = data.shape[0]
+    extended = _SCRATCH.get("extended", (length + 2 * radius + 2,) + data.shape[1:])
+    sums = _SCRATCH.get("sums", (length + 2 * radius + 3,) + data.shape[1:])
+
+    extended[radius + 1:radius + 1 + length] = data
+    extended[:radius + 1] = data[0]
+    extended[radius + 1 + length:] = data[-1]
+
+    sums[0] = 0
+    np.cumsum(extended, axis=0, out=sums[1:])
+
+    np.subtract(sums[2 * radius + 2:2 * radius + 2 + length], sums[1:1 + length], out=data)
+    if fraction:
+        data += fraction * (extended[:length] + extended[2 * radius + 2:2 * radius + 2 + length])
+
+    data *= 1 / (2 * radius + 1 + 2 * fraction)
+
+
+def _scale_down(data, factor):
+    # Average of each factor pixels along the first axis (strided adds, i.e. a single pass over the pixels)
+    length = data.shape[0]
+    sums = np.zeros((-(-length // factor),) + data.shape[1:], dtype=np.float32)
+    for offset in range(factor):
+        part = data[offset::factor]
+        sums[:len(part)] += part
+
+    sums[-1] *= factor / (length - (len(sums) - 1) * factor)
+    sums *= 1 / factor
+    return sums
+
+
+def _scale_up(data, factor, out):
+    # Linear interpolation between the pixel centres along the first axis, as for PIL BILINEAR.
+    # Output pixels at the same offset within each factor pixels have the same weights
+    count = data.shape[0]
+    extended = np.concatenate((data[:1], data, data[-1:]))
+
+    for offset in range(factor):
+        view = out[offset::factor]
+        position = (offset + 0.5) / factor - 0.5
+        lower = 0 if position < 0 else 1
+        weight = position + 1 - lower
+
+        np.subtract(extended[lower + 1:lower + 1 + len(view)], extended[lower:lower + len(view)], out=view)
+        view *= weight
+        view += extended[lower:lower + len(view)]
+
+    return out
+
+
+def _blur_array(region, radius):
+    # h x w x c pixels -> blurred h x w x c float32 (in a scratch buffer).
+    # Same as _blur(), big radii are blurred at a reduced (whole) scale
+    factors = [max(1, math.ceil(axis_radius / FAST_BLUR_RADIUS)) for axis_radius in radius]
+    if factors == [1, 1]:
+        blurred = _SCRATCH.get("blurred", region.shape)
+        blurred[...] = region
+    else:
+        blurred = np.moveaxis(_scale_down(np.moveaxis(_scale_down(region, factors[1]), 1, 0), factors[0]), 0, 1)
+
+    for axis, axis_radius, factor in ((1, radius[0], factors[0]), (0, radius[1], factors[1])):
+        whole, fraction = _box_radius(axis_radius / factor)
+        if whole or fraction:
+            for _ in range(3):
+                _box_blur(np.moveaxis(blurred, axis, 0), whole, fraction)
+
+    if factors == [1, 1]:
+        return blurred
+
+    # Along the rows first, while there are fewer of them
+    scaled = _SCRATCH.get("scaled", blurred.shape[:1] + region.shape[1:])
+    _scale_up(np.moveaxis(blurred, 1, 0), factors[0], np.moveaxis(scaled, 1, 0))
+    return _scale_up(scaled, factors[1], _SCRATCH.get("blurred", region.shape))
+
+
+def _blend(view, blurred, mask=None):
+    # view = view + (blurred - view) * mask, written straight back into the frame
+    if mask is not None:
+        alpha = _SCRATCH.get("alpha", mask.shape + (1,))
+        np.multiply(mask[..., None], 1 / 255, out=alpha)
+
+        blurred -= view
+        blurred *= alpha
+        blurred += view
+
+    np.add(blurred, 0.5, out=view, casting="unsafe")
+
+
+def _clip_region(region, width, height):
+    # -> (slices of the region in the image, slices of the image in the region)
+    top, right, bottom, left = region
+    clipped_top, clipped_left = max(top, 0), max(left, 0)
+    clipped_bottom, clipped_right = min(bottom, height), min(right, width)
+
+    return ((slice(clipped_top, clipped_bottom), slice(clipped_left, clipped_right)),
+            (slice(clipped_top - top, clipped_bottom - top), slice(clipped_left - left, clipped_right - left)))
+
+
+def _run(tasks, executor=None):
+    # Tasks write into disjoint regions of the same array (numpy releases the GIL for most of the work)
+    if executor is not None and len(tasks) > 1:
+        list(executor.map(lambda task: task(), tasks))
+    else:
+        for task in tasks:
+            task()
+
+
+def _blur_rect_array_region(array, region, boxes, radius):
+    top, right, bottom, left = region
+    view = array[top:bottom, left:right]
+    blurred = _blur_array(view, radius)
+
+    if len(boxes) == 1:
+        _blend(view, blurred)
+        return
+
+    # Only the faces, i.e. not the corners of the region
+    for face_top, face_right, face_bottom, face_left in boxes.tolist():
+        face = (slice(face_top - top, face_bottom - top), slice(face_left - left, face_right - left))
+        _blend(view[face], blurred[face])
+
+
+def blur_faces_rect_array(array, faces, strength, executor=None, cache=None):
+    boxes, tracks = _denormalise(faces, array.shape[1], array.shape[0])
+
+    # Calculate blur strength
+    radii = _calculate_filter_sizes(boxes, strength)
+
+    _run([
+        functools.partial(
+            _blur_rect_array_region, array, region, boxes[indices], tuple(radii[indices].max(axis=0).tolist()))
+        for region, indices in _plan(boxes)], executor)
+
+    return array
+
+
+def _blur_graceful_array_region(array, region, boxes, radii):
+    top, right, bottom, left = region
+
+    # Oval masks for the faces in the region, expanded for the feather effect (the most opaque one at each pixel)
+    mask = np.zeros((bottom - top, right - left), dtype=np.uint8)
+    for (face_top, face_right, face_bottom, face_left), (r_x, r_y) in zip(boxes.tolist(), radii.tolist()):
+        face_mask = np.asarray(MASKS.get(face_right - face_left, face_bottom - face_top, (r_x, r_y)))
+
+        y, x = face_top - r_y - top, face_left - r_x - left
+        area = mask[y:y + face_mask.shape[0], x:x + face_mask.shape[1]]
+        np.maximum(area, face_mask, out=area)
+
+    # The region may go outside of the image because of the feathering
+    in_image, in_region = _clip_region(region, array.shape[1], array.shape[0])
+    view = array[in_image]
+
+    _blend(view, _blur_array(view, tuple(radii.max(axis=0).tolist())), mask[in_region])
+
+
+def blur_faces_graceful_array(array, faces, strength, executor=None, cache=None):
+    boxes, tracks = _denormalise(faces, array.shape[1], array.shape[0])
+
+    # Calculate blur strength
+    radii = _calculate_filter_sizes(boxes, strength)
+
+    # Face areas expanded for the feather effect of the oval masks
+    expanded = boxes + np.stack((-radii[:, 1], radii[:, 0], radii[:, 1], -radii[:, 0]), axis=1)
+
+    _run([
+        functools.partial(_blur_graceful_array_region, array, region, boxes[indices], radii[indices])
+        for region, indices in _plan(expanded)], executor)
+
+    return array
+
+
+def pixelate_faces_array(array, faces, strength, executor=None, cache=None):
+    boxes, tracks = _denormalise(faces, array.shape[1], array.shape[0])
+
+    # Calculate block sizes
+    blocks = _calculate_block_sizes(boxes, strength)
+
+    for (top, right, bottom, left), (block_x, block_y) in zip(boxes.tolist(), blocks.tolist()):
+        view = array[top:bottom, left:right]
+        if not view.size:
+            continue
+
+        # Average each block and fill it with its average. Blocks are spread as with scaling the face down
+        # to a pixel per block and back up, as for PIL
+        height, width = view.shape[:2]
+        blocks_y, blocks_x = max(1, -(-height // block_y)), max(1, -(-width // block_x))
+        starts_y = np.searchsorted((np.arange(height) + 0.5) * blocks_y // height, np.arange(blocks_y))
+        starts_x = np.searchsorted((np.arange(width) + 0.5) * blocks_x // width, np.arange(blocks_x))
+        sums = np.add.reduceat(np.add.reduceat(view, starts_y, axis=0, dtype=np.float32), starts_x, axis=1)
+        counts_y, counts_x = np.diff(starts_y, append=height), np.diff(starts_x, append=width)
+
+        averages = sums / (counts_y[:, None, None] * counts_x[None, :, None]) + 0.5
+        view[...] = np.repeat(np.repeat(averages, counts_y, axis=0), counts_x, axis=1)
+
+    return array
+
+
+def fill_faces_array(array, faces, strength, executor=None, cache=None):
+    # Strength makes no difference: the faces are completely covered (including the bottom right edges, as PIL)
+    colour = ImageColor.getrgb(SOLID_COLOUR)[:array.shape[2]]
+
+    boxes, tracks = _denormalise(faces, array.shape[1], array.shape[0])
+    for top, right, bottom, left in boxes.tolist():
+        array[top:bottom + 1, left:right + 1] = colour
+
+    return array
+
+
+# Same modes working in place on h x w x c uint8 arrays (e.g. rgb24 video frames).
+# The patches of these are not cached, as they are not copies
+ARRAY_MODES = {
+    fb_mode.Mode.RECT_BLUR: blur_faces_rect_array,
+    fb_mode.Mode.GRACEFUL_BLUR: blur_faces_graceful_array,
+    fb_mode.Mode.PIXELATE: pixelate_faces_array,
+    fb_mode.Mode.SOLID: fill_faces_array,
 }
 
 
-def blur_faces(mode: fb_mode.Mode, image: Image, faces, strength=STRENGTH):
-    if mode not in MODES:
+def create_executor(threads):
+    # Threads for obfuscating separate regions of an image at the same time (None for a single thread)
+    if threads is None or threads <= 1:
+        return contextlib.nullcontext()
+
+    return concurrent.futures.ThreadPoolExecutor(threads, thread_name_prefix="obfuscate")
+
+
+def blur_faces(mode: fb_mode.Mode, image: Image, faces, strength=STRENGTH, executor=None, cache: PatchCache = None):
+    # image is a PIL image (Backend.PIL) or a writable h x w x c uint8 array (Backend.NUMPY, changed in place).
+    # faces are a list of Box or a FaceTable (e.g. of a single frame).
+    # The cache (if any) must be used only for the frames of a single stream, in order,
+    # and advanced with PatchCache.next_frame() for each of them
+    modes = ARRAY_MODES if isinstance(image, np.ndarray) else MODES
+    if mode not in modes:
         raise ValueError(f"Unsupported mode for blurring: {mode}")
 
-    return MODES[mode](image, faces, strength)
+    return modes[mode](image, faces, strength, executor, cache)
@@ -1,35 +1,184 @@
 # Copyright (C) 2025, Simona Dimitrova
 
+import collections
+
+import faceblur.faces.detector as fb_detector
 import faceblur.faces.track as fb_track
 import faceblur.faces.interpolate as fb_interpolate
+import faceblur.faces.table as fb_table
 
 
 MIN_FACE_DURATION = 1
 TRACKING_DURATION = 1
 
 
-def process_faces_in_frames(frames, encodings, frame_rate, score,
-                            min_face_duration=MIN_FACE_DURATION,
-                            tracking_duration=TRACKING_DURATION):
+def process_faces(table: fb_table.FaceTable, frame_rate, score=None,
+                  min_face_duration=MIN_FACE_DURATION,
+                  tracking_duration=TRACKING_DURATION,
+                  prediction=False,
+                  encoding_smoothing=fb_track.ENCODING_SMOOTHING,
+                  encoding_index=False,
+                  confidence=None):
+
+    # Only the faces found with at least that confidence (in %)
+    table = fb_detector.filter_table(table, confidence)
+
+    encodings = table.encodings is not None
 
     if score is None:
         # Set default score if not provided
         score = fb_track.ENCODING_MAX_DISTANCE if encodings else fb_track.IOU_MIN_OVERLAP
 
+    # Faces further apart can't be interpolated, so there is no need to track them any longer
+    tracking_max_frame_distance = int(tracking_duration * frame_rate)
+    min_track_size = int(min_face_duration * frame_rate)
+
     # Bin faces into tracks in order to filter false positives and interpolate false negatives
     if encodings:
         # Use advanced tracking through face encodings (supported by model)
-        tracks, frames_with_tracks = fb_track.track_faces_encodings(frames, encodings, score)
+        tracker = fb_track.EncodingTracker(score, tracking_max_frame_distance, encoding_smoothing, encoding_index,
+                                           max_continue_distance=tracking_max_frame_distance + min_track_size)
     else:
         # Use simple tracking via IoU
-        tracks, frames_with_tracks = fb_track.track_faces_iou(frames, score)
+        tracker = fb_track.IouTracker(score, tracking_max_frame_distance, prediction=prediction,
+                                      max_continue_distance=tracking_max_frame_distance + min_track_size)
 
-    # Filter out false positives (i.e. faces from unpopular tracks)
-    min_track_size = int(min_face_duration * frame_rate)
-    frames_with_tracks = fb_track.filter_frames_with_tracks(tracks, frames_with_tracks, min_track_size)
+    tracked = fb_track.track_faces(table, tracker)
+
+    # Filter out false positives (i.e. faces from unpopular tracks).
+    # A face found again after its track expired (but not for longer than the min face duration)
+    # still counts the faces of the expired track
+    tracked = fb_track.filter_tracks(tracked, min_track_size, tracker.identities)
 
     # Interpolate false negatives (i.e. faces missing from some frames)
-    tracking_max_frame_distance = int(tracking_duration * frame_rate)
-    frames_interpolated = fb_interpolate.interpolate_faces(tracks, frames_with_tracks, tracking_max_frame_distance)
+    return table, fb_interpolate.interpolate_table(tracked, tracking_max_frame_distance)
+
+
+def process_faces_in_frames(frames, encodings, frame_rate, score=None,
+                            min_face_duration=MIN_FACE_DURATION,
+                            tracking_duration=TRACKING_DURATION,
+                            prediction=False,
+                            encoding_smoothing=fb_track.ENCODING_SMOOTHING,
+                            encoding_index=False):
+
+    table = fb_table.FaceTable.from_frames(frames, encodings)
+    table, processed = process_faces(table, frame_rate, score, min_face_duration, tracking_duration, prediction,
+                                     encoding_smoothing, encoding_index)
+
+    return frames, processed.to_frames()
+
+
+class OnlineProcessor:
+    # Same as process_faces_in_frames(), but frames are pushed one at a time and
+    # their processed faces are returned as soon as no future frame can change them
+    def __init__(self, frame_rate, encodings=False, score=None,
+                 min_face_duration=MIN_FACE_DURATION,
+                 tracking_duration=TRACKING_DURATION,
+                 prediction=False,
+                 encoding_smoothing=fb_track.ENCODING_SMOOTHING,
+                 encoding_index=False):
+
+        if score is None:
+            # Set default score if not provided
+            score = fb_track.ENCODING_MAX_DISTANCE if encodings else fb_track.IOU_MIN_OVERLAP
+
+        self._tracking_max_frame_distance = int(tracking_duration * frame_rate)
+        self._min_track_size = int(min_face_duration * frame_rate)
+
+        # Same as in process_faces()
+        max_continue_distance = self._tracking_max_frame_distance + self._min_track_size
+
+        if encodings:
+            self._tracker = fb_track.EncodingTracker(score, self._tracking_max_frame_distance,
+                                                     encoding_smoothing, encoding_index,
+                                                     max_continue_distance=max_continue_distance)
+        else:
+            self._tracker = fb_track.IouTracker(score, self._tracking_max_frame_distance, prediction=prediction,
+                                                max_continue_distance=max_continue_distance)
+
+        # The most recently pushed frame
+        self._frame_index = -1
+
+        # Frames not returned yet, starting from _first_pending. Each one is a list of (face, track_index),
+        # i.e. the faces found in it, followed by the faces interpolated into it from later frames
+        self._pending = collections.deque()
+        self._first_pending = 0
+
+        # track_index -> (frame_index, face) where it was last found
+        self._previous_faces = {}
+
+        # Number of faces of each identity (i.e. including the tracks it continues) and the frame it was last found in
+        self._identity_sizes = collections.Counter()
+        self._identity_last_frames = {}
+
+    def _is_kept(self, track_index, end):
+        # True/False once it is known if the track is long enough, None if it may still grow,
+        # either by being found again or by being continued by a new track
+        identity = self._tracker.identities[track_index]
+        if self._identity_sizes[identity] >= self._min_track_size:
+            return True
+
+        if end or self._frame_index + 1 - self._identity_last_frames[identity] >= self._tracker.max_continue_distance:
+            return False
+
+        return None
+
+    def _finalised_frame(self, end):
+        # Future faces can only be interpolated into frames after the one their track was last found in
+        if end:
+            return self._frame_index
+
+        if self._frame_index + 1 < self._tracking_max_frame_distance - 1:
+            # New tracks may still be interpolated back to the start
+            return -1
+
+        tracks, last_frames = self._tracker.live
+        last_frames = last_frames[self._frame_index + 1 - last_frames < self._tracking_max_frame_distance]
+
+        return last_frames.min().item() if len(last_frames) else self._frame_index
+
+    def _pop(self, end):
+        finalised = []
+        finalised_frame = self._finalised_frame(end)
+
+        while self._pending and self._first_pending <= finalised_frame:
+            kept = {track_index: self._is_kept(track_index, end) for face, track_index in self._pending[0]}
+            if None in kept.values():
+                break
+
+            faces = self._pending.popleft()
+            finalised.append((self._first_pending, [face for face, track_index in faces if kept[track_index]]))
+            self._first_pending += 1
+
+        return finalised
+
+    def push(self, frame_index, faces, encodings=None):
+        # Frames must be pushed in order. Returns a list of (frame_index, processed faces)
+        assert frame_index == self._frame_index + 1
+        self._frame_index = frame_index
+
+        faces_with_tracks = self._tracker.update(frame_index, faces, encodings)
+        for face, track_index in faces_with_tracks:
+            identity = self._tracker.identities[track_index]
+            self._identity_sizes[identity] += 1
+            self._identity_last_frames[identity] = frame_index
+
+        # Interpolate false negatives (i.e. faces missing from some frames)
+        for face, track_index in faces_with_tracks:
+            previous_frame, previous_face = self._previous_faces.get(track_index, (-1, face))
+            frame_distance = frame_index - previous_frame
+            if 1 < frame_distance < self._tracking_max_frame_distance:
+                new_faces = fb_interpolate.interpolate_boxes(previous_face, face, frame_distance - 1)
+                for offset, new_face in enumerate(new_faces):
+                    self._pending[previous_frame + 1 + offset - self._first_pending].append((new_face, track_index))
+
+            self._previous_faces[track_index] = (frame_index, face)
+
+        self._pending.append(list(faces_with_tracks))
+
+        # Filter out false positives (i.e. faces from unpopular tracks) once their tracks are done
+        return self._pop(end=False)
 
-    return frames, frames_interpolated
+    def close(self):
+        # No more frames. Returns the remaining ones
+        return self._pop(end=True)
@@ -0,0 +1,68 @@
+# Copyright (C) 2025, Simona Dimitrova
+
+import numpy as np
+
+import faceblur.box as fb_box
+
+
+# How much to enlarge a region on each side (in percent of its size)
+MARGIN = 50
+
+
+def expand(box: fb_box.Box, margin=MARGIN):
+    # margin is in %
+    margin_x = box.width * margin / 100
+    margin_y = box.height * margin / 100
+
+    # Keep it within the (normalised) image
+    return fb_box.Box(
+        max(0, box.top - margin_y),
+        min(1, box.right + margin_x),
+        min(1, box.bottom + margin_y),
+        max(0, box.left - margin_x))
+
+
+def merge(regions):
+    # Union intersecting regions until all of them are disjoint,
+    # so that a face can never be found (or split) in two regions
+    merged = []
+
+    for region in regions:
+        while True:
+            for index, other in enumerate(merged):
+                if region.intersect(other):
+                    # Absorb it and check again as the union is bigger
+                    region = region.union(merged.pop(index))
+                    break
+            else:
+                break
+
+        merged.append(region)
+
+    return merged
+
+
+def crop(arr: np.ndarray, region: fb_box.Box):
+    height, width = arr.shape[:2]
+
+    # Denormalise the region
+    region = region.denormalise(width, height)
+
+    # Crop (inclusive) and make sure it is contiguous for the detectors
+    cropped = arr[region.top:region.bottom + 1, region.left:region.right + 1]
+
+    return np.ascontiguousarray(cropped), region
+
+
+def from_crop(face: fb_box.Box, region: fb_box.Box, width, height):
+    # Map a face normalised to the cropped (denormalised) region back into
+    # a face normalised to the whole image
+    region_width = region.width + 1
+    region_height = region.height + 1
+
+    return fb_box.Box(
+        (region.top + face.top * region_height) / height,
+        (region.left + face.right * region_width) / width,
+        (region.top + face.bottom * region_height) / height,
+        (region.left + face.left * region_width) / width,
+        face.score)
@@ -0,0 +1,65 @@
+# Copyright (C) 2025, Simona Dimitrova
+
+import importlib
+
+import faceblur.faces.model as fb_model
+
+
+# Third-party detectors register a factory, i.e. callable(**options) -> Detector, e.g.:
+#
+# [project.entry-points."faceblur.detectors"]
+# MY_MODEL = "my_package.detector:MyDetector"
+ENTRY_POINTS = "faceblur.detectors"
+
+
+class Registry:
+    def __init__(self, group=None):
+        self._detectors = {}
+        self._group = group
+        self._entry_points_loaded = False
+
+    def register(self, name, module, factory, *args):
+        # Only keep where to find it, the module is imported the first time the model is selected
+        self._detectors[name] = (module, factory, args)
+
+    def _load_entry_points(self):
+        if self._entry_points_loaded or not self._group:
+            return
+
+        self._entry_points_loaded = True
+
+        # Slow to import, so only when needed
+        import importlib.metadata
+
+        for entry_point in importlib.metadata.entry_points(group=self._group):
+            # Built-in detectors cannot be overridden
+            if entry_point.name not in self._detectors:
+                self.register(entry_point.name, entry_point.module, entry_point.attr)
+
+    def __contains__(self, name):
+        self._load_entry_points()
+        return name in self._detectors
+
+    def __iter__(self):
+        self._load_entry_points()
+        return iter(list(self._detectors))
+
+    def create(self, name, options={}):
+        if name not in self:
+            raise ValueError(f"Unsupported model: {name}")
+
+        module, factory, args = self._detectors[name]
+
+        # Import the backend only now
+        factory = getattr(importlib.import_module(module), factory)
+
+        return factory(*args, **options)
+
+
+DETECTORS = Registry(ENTRY_POINTS)
+
+DETECTORS.register(fb_model.Model.MEDIA_PIPE_SHORT_RANGE, "faceblur.faces.mediapipe", "MediaPipeDetector", 0)
+DETECTORS.register(fb_model.Model.MEDIA_PIPE_FULL_RANGE, "faceblur.faces.mediapipe", "MediaPipeDetector", 1)
+DETECTORS.register(fb_model.Model.DLIB_HOG, "faceblur.faces.dlib", "DLibDetector", "hog")
+DETECTORS.register(fb_model.Model.DLIB_CNN, "faceblur.faces.dlib", "DLibDetector", "cnn")
+DETECTORS.register(fb_model.Model.CASCADE, "faceblur.faces.cascade", "CascadeDetector")
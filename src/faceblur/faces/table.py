@@ -0,0 +1,132 @@
+# Copyright (C) 2025, Simona Dimitrova
+
+import numpy as np
+
+import faceblur.box as fb_box
+
+
+class FaceTable:
+    # Faces of a sequence of frames as columns (struct of arrays), instead of a Box object per face.
+    # Rows are sorted by frame, the faces of a frame being rows offsets[frame]:offsets[frame + 1]
+    def __init__(self, frame_count, frames, boxes, scores=None, tracks=None, encodings=None,
+                 first_frame=0, offsets=None):
+        self._frame_count = frame_count
+        self._first_frame = first_frame
+
+        # Frame index of each face
+        self._frames = np.asarray(frames, dtype=np.int64)
+
+        # (top, right, bottom, left) of each face
+        self._boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+
+        # NaN for faces without a score (i.e. model does not provide one)
+        self._scores = np.full(len(self._frames), np.nan) if scores is None else np.asarray(scores, dtype=np.float64)
+
+        # -1 for faces not tracked
+        self._tracks = np.full(len(self._frames), -1, dtype=np.int64) if tracks is None else np.asarray(
+            tracks, dtype=np.int64)
+
+        # Encoding of each face (N x D), if supported by the model
+        self._encodings = encodings
+
+        if offsets is None:
+            offsets = np.searchsorted(self._frames, np.arange(first_frame, first_frame + frame_count + 1))
+
+        self._offsets = offsets
+
+    @classmethod
+    def from_frames(cls, frames, encodings=None):
+        # list (frames) of lists (faces) of Box and optionally a list of lists of encodings
+        faces = [face for frame in frames for face in frame]
+
+        if encodings:
+            encodings = [encoding for frame in encodings for encoding in frame]
+            encodings = np.array(encodings, dtype=np.float32).reshape(len(encodings), -1) if encodings else np.empty(
+                (0, 0), dtype=np.float32)
+        else:
+            encodings = None
+
+        return cls(
+            len(frames),
+            np.repeat(np.arange(len(frames)), [len(frame) for frame in frames]),
+            fb_box.to_array(faces),
+            [np.nan if face.score is None else face.score for face in faces],
+            encodings=encodings)
+
+    @property
+    def frame_count(self):
+        return self._frame_count
+
+    @property
+    def frames(self):
+        return self._frames
+
+    @property
+    def boxes(self):
+        return self._boxes
+
+    @property
+    def scores(self):
+        return self._scores
+
+    @property
+    def tracks(self):
+        return self._tracks
+
+    @property
+    def encodings(self):
+        return self._encodings
+
+    @property
+    def offsets(self):
+        return self._offsets
+
+    def __len__(self):
+        return len(self._frames)
+
+    def __iter__(self):
+        # Box for each face. Only for the places that need objects, e.g. drawing
+        for box, score in zip(self._boxes.tolist(), self._scores.tolist()):
+            yield fb_box.Box(*box, None if np.isnan(score) else score)
+
+    def frame(self, frame_index):
+        # The faces of a single frame as views of the columns
+        start, end = self._offsets[frame_index - self._first_frame:frame_index - self._first_frame + 2].tolist()
+
+        return FaceTable(
+            1,
+            self._frames[start:end],
+            self._boxes[start:end],
+            self._scores[start:end],
+            self._tracks[start:end],
+            None if self._encodings is None else self._encodings[start:end],
+            first_frame=frame_index,
+            offsets=np.array([0, end - start]))
+
+    def select(self, rows):
+        # Only some of the faces (mask or sorted indices)
+        return FaceTable(
+            self._frame_count,
+            self._frames[rows],
+            self._boxes[rows],
+            self._scores[rows],
+            self._tracks[rows],
+            None if self._encodings is None else self._encodings[rows],
+            first_frame=self._first_frame)
+
+    def with_tracks(self, tracks):
+        return FaceTable(
+            self._frame_count, self._frames, self._boxes, self._scores, tracks, self._encodings,
+            first_frame=self._first_frame, offsets=self._offsets)
+
+    def to_frames(self):
+        faces = list(self)
+        return [faces[start:end] for start, end in zip(self._offsets[:-1].tolist(), self._offsets[1:].tolist())]
+
+    def to_json(self):
+        return [[face.to_json() for face in frame] for frame in self.to_frames()]
+
+
+def to_array(faces):
+    # N x 4 boxes of a FaceTable or a list of Box
+    return faces.boxes if isinstance(faces, FaceTable) else fb_box.to_array(faces)
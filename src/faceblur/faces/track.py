@@ -1,92 +1,529 @@
 # Copyright (C) 2025, Simona Dimitrova
 
-import face_recognition
+import numpy as np
+
+import faceblur.box as fb_box
+import faceblur.faces.index as fb_index
+import faceblur.faces.table as fb_table
+
+from enum import StrEnum
 
 IOU_MIN_OVERLAP = 5
 ENCODING_MAX_DISTANCE = 60
+ENCODING_SMOOTHING = 0
 
 
-def track_faces_iou(frames, min_overlap=IOU_MIN_OVERLAP):
-    tracks = []
-    frames_with_tracks = []
+# Constant velocity Kalman filter (in normalised coordinates per frame). Each side of a box is filtered
+# on its own, but with the same noise, so all of them share the same covariance
+KALMAN_PROCESS_NOISE = 0.002
+KALMAN_MEASUREMENT_NOISE = 0.005
+KALMAN_VELOCITY = 0.05
 
-    # min_overlap is in %
-    min_overlap /= 100
+_KALMAN_PROCESS_VARIANCE = KALMAN_PROCESS_NOISE ** 2
+_KALMAN_MEASUREMENT_VARIANCE = KALMAN_MEASUREMENT_NOISE ** 2
+_KALMAN_VELOCITY_VARIANCE = KALMAN_VELOCITY ** 2
 
-    for faces in frames:
-        frame = []
 
-        if faces:
-            for face in faces:
-                # The stats
-                best_track_index = -1
-                best_track_score = 0
+def _kalman_predict(states, frames):
+    # N x (4 positions, 4 velocities, 3 covariances) states -> states that many frames later
+    positions, velocities, (p00, p01, p11) = states[:, :4], states[:, 4:8], states[:, 8:].T
+    dt = frames.astype(np.float64)
+    q = _KALMAN_PROCESS_VARIANCE
 
-                # Check if this face matches a track
-                for track_index, track in enumerate(tracks):
-                    # Compare against the most recent instance of the track
-                    score = face.intersection_over_union(track[-1])
-                    if score > best_track_score:
-                        best_track_score = score
-                        best_track_index = track_index
+    return np.concatenate((
+        positions + velocities * dt[:, None],
+        velocities,
+        np.stack((
+            p00 + 2 * dt * p01 + dt ** 2 * p11 + q * dt ** 3 / 3,
+            p01 + dt * p11 + q * dt ** 2 / 2,
+            p11 + q * dt), axis=1)), axis=1)
 
-                # Did we find a track?
-                if best_track_score < min_overlap:
-                    # New track
-                    best_track_index = len(tracks)
-                    tracks.append([face])
 
-                tracks[best_track_index].append(face)
-                frame.append((face, best_track_index))
+def _kalman_correct(states, boxes):
+    # Predicted N x 11 states and the N x 4 boxes found -> corrected states
+    positions, velocities, (p00, p01, p11) = states[:, :4], states[:, 4:8], states[:, 8:].T
 
-        frames_with_tracks.append(frame)
+    gain_position = p00 / (p00 + _KALMAN_MEASUREMENT_VARIANCE)
+    gain_velocity = p01 / (p00 + _KALMAN_MEASUREMENT_VARIANCE)
+    residuals = boxes - positions
 
-    return tracks, frames_with_tracks
+    return np.concatenate((
+        positions + gain_position[:, None] * residuals,
+        velocities + gain_velocity[:, None] * residuals,
+        np.stack((
+            (1 - gain_position) * p00,
+            (1 - gain_position) * p01,
+            p11 - gain_velocity * p01), axis=1)), axis=1)
 
 
-def track_faces_encodings(frames, encodings_for_frames, encoding_max_distance=ENCODING_MAX_DISTANCE):
-    tracks = []
-    frames_with_tracks = []
+def _assign(costs, valid):
+    # Greedy one-to-one assignment: rows x cols -> {row: col}
+    rows, cols = np.nonzero(valid)
+    return _assign_pairs(rows, cols, costs[rows, cols])
 
-    # encoding_max_distance is in %
-    encoding_max_distance /= 100
 
-    assert len(frames) == len(encodings_for_frames)
+def _assign_pairs(rows, cols, costs):
+    # Take the pairs with the lowest cost first, skipping rows and cols already taken
+    order = np.argsort(costs, kind="stable")
+
+    assigned = {}
+    taken = set()
+    for row, col in zip(rows[order].tolist(), cols[order].tolist()):
+        if row not in assigned and col not in taken:
+            assigned[row] = col
+            taken.add(col)
+
+    return assigned
+
+
+class TrackState(StrEnum):
+    # Found in the most recent frame
+    ACTIVE = "ACTIVE"
+
+    # Not found in the most recent frame, but may still be found (and interpolated)
+    LOST = "LOST"
+
+    # Not found for too long. Never matched again, but a new track may continue it (see identities)
+    EXPIRED = "EXPIRED"
+
+
+class Tracker:
+    def __init__(self, max_frame_distance=None, max_continue_distance=None):
+        # Tracks are expired when not found for max_frame_distance frames (never if None)
+        self._max_frame_distance = max_frame_distance
+
+        # Expired tracks can be continued by faces found less than max_continue_distance frames
+        # after their last face (never if None)
+        self._max_continue_distance = max_continue_distance
+
+        # Faces and states of all tracks
+        self._tracks = []
+        self._states = []
+
+        # The first track of each face, i.e. the same for tracks continuing expired ones
+        self._identities = []
+
+        # Expired tracks that can still be continued, the frames they were last found in and their features.
+        # Only compared against the faces that would start new tracks. The first _expired_count rows are used,
+        # the rest is room to grow
+        self._expired = np.empty(0, dtype=np.int64)
+        self._expired_last_frames = np.empty(0, dtype=np.int64)
+        self._expired_features = None
+        self._expired_count = 0
+
+        # Only the tracks that can still be matched (i.e. active or lost), so that
+        # matching depends on the number of faces visible and not on the length of the video
+        self._live = np.empty(0, dtype=np.int64)
+        self._live_last_frames = np.empty(0, dtype=np.int64)
+        self._live_features = None
+
+        # Optional index of the live tracks (by position) used to find candidates for matching
+        self._index = None
+
+    @property
+    def tracks(self):
+        return self._tracks
+
+    @property
+    def states(self):
+        return self._states
+
+    @property
+    def identities(self):
+        return self._identities
+
+    @property
+    def live(self):
+        # Indices of the tracks that can still be matched and the frames they were last found in
+        return self._live, self._live_last_frames
+
+    @property
+    def max_frame_distance(self):
+        # Tracks not found for that many frames are expired (never if None)
+        return None if self._max_frame_distance is None else max(2, self._max_frame_distance)
+
+    @property
+    def max_continue_distance(self):
+        # Tracks not found for that many frames can't get any more faces, either matched or continued
+        if self._max_frame_distance is None:
+            return None
+
+        if self._max_continue_distance is None:
+            return self.max_frame_distance
+
+        return max(self.max_frame_distance, self._max_continue_distance)
+
+    def _features(self, boxes, encodings):
+        # N x 4 boxes -> array of whatever is used for matching
+        raise NotImplementedError()
+
+    def _match(self, frame_index, features):
+        # Returns the position in the live tracks for each face, or None for new tracks
+        raise NotImplementedError()
+
+    def _match_all(self, features, tracked):
+        # Same as _match(), but against all of the tracked features given, without an index
+        raise NotImplementedError()
+
+    def _add_expired(self, tracks, last_frames, features):
+        count = self._expired_count + len(tracks)
+
+        if self._expired_features is None or count > len(self._expired):
+            # Grow by doubling, so that adding is amortised
+            capacity = max(count, 2 * len(self._expired))
+            used = self._expired_count
+
+            expired = np.empty(capacity, dtype=np.int64)
+            expired_last_frames = np.empty(capacity, dtype=np.int64)
+            expired_features = np.empty((capacity,) + features.shape[1:], dtype=features.dtype)
+
+            expired[:used] = self._expired[:used]
+            expired_last_frames[:used] = self._expired_last_frames[:used]
+            if used:
+                expired_features[:used] = self._expired_features[:used]
+
+            self._expired = expired
+            self._expired_last_frames = expired_last_frames
+            self._expired_features = expired_features
+
+        self._expired[self._expired_count:count] = tracks
+        self._expired_last_frames[self._expired_count:count] = last_frames
+        self._expired_features[self._expired_count:count] = features
+        self._expired_count = count
+
+    def _remove_expired(self, keep):
+        # keep is a mask of the used rows
+        count = np.count_nonzero(keep)
+        if count == self._expired_count:
+            return
+
+        used = slice(0, self._expired_count)
+        self._expired[:count] = self._expired[used][keep]
+        self._expired_last_frames[:count] = self._expired_last_frames[used][keep]
+        self._expired_features[:count] = self._expired_features[used][keep]
+        self._expired_count = count
+
+    def _continue(self, frame_index, features, positions):
+        # The expired track continued by each face that would start a new track (or None)
+        if self._expired_count:
+            # Forget the ones found too long ago, so that only the recently expired tracks are compared
+            self._remove_expired(frame_index - self._expired_last_frames[:self._expired_count]
+                                 < self.max_continue_distance)
+
+        unmatched = [index for index, position in enumerate(positions) if position is None]
+        if not unmatched or not self._expired_count:
+            return [None] * len(positions)
+
+        continued = [None] * len(positions)
+        matched = self._match_all(features[unmatched], self._expired_features[:self._expired_count])
+        for index, position in zip(unmatched, matched):
+            if position is not None:
+                continued[index] = self._expired[position].item()
+
+        # Each expired track is continued at most once
+        keep = np.ones(self._expired_count, dtype=bool)
+        keep[[position for position in matched if position is not None]] = False
+        self._remove_expired(keep)
+
+        return continued
+
+    def _create_index(self, features):
+        # No index by default, i.e. compare against all live tracks
+        return None
+
+    def _candidates(self, features):
+        # (face, live position) pairs that share a bucket in the index
+        rows = []
+        cols = []
+        for row, candidates in enumerate(self._index.query(features)):
+            rows += [row] * len(candidates)
+            cols += candidates
+
+        return np.array(rows, dtype=np.int64), np.array(cols, dtype=np.int64)
+
+    def _store(self, positions, features, new):
+        # Keep the features of the most recent faces for matching
+        self._live_features[positions] = features
+
+        if self._index is None:
+            self._index = self._create_index(features)
+
+        if self._index is not None:
+            self._index.update(positions, features)
+
+    def _expire(self, frame_index):
+        if self._max_frame_distance is None:
+            return
+
+        # Subsequent faces always belong to the same track
+        keep = frame_index - self._live_last_frames < self.max_frame_distance
+        if keep.all():
+            return
+
+        for track_index in self._live[~keep].tolist():
+            self._states[track_index] = TrackState.EXPIRED
+
+        if self.max_continue_distance > self.max_frame_distance:
+            self._add_expired(self._live[~keep], self._live_last_frames[~keep], self._live_features[~keep])
+
+        self._live = self._live[keep]
+        self._live_last_frames = self._live_last_frames[keep]
+        self._live_features = self._live_features[keep]
+
+        if self._index is not None:
+            # The positions of the live tracks have changed
+            self._index.clear()
+            self._index.update(range(len(self._live)), self._live_features)
+
+    def assign(self, frame_index, boxes, encodings=None):
+        # N x 4 boxes (and their encodings) found in a frame -> track index of each of them.
+        # Does not keep the faces in the tracks, i.e. only the track states are updated
+        self._expire(frame_index)
+
+        for track_index in self._live.tolist():
+            self._states[track_index] = TrackState.LOST
 
-    for frame_index in range(len(frames)):
-        faces = frames[frame_index]
-        encodings = encodings_for_frames[frame_index]
+        if not len(boxes):
+            return np.empty(0, dtype=np.int64)
+
+        features = self._features(boxes, encodings)
+        positions = self._match(frame_index, features)
+        new = np.array([position is None for position in positions])
+        continued = self._continue(frame_index, features, positions)
+
+        new_tracks = []
+        for index, position in enumerate(positions):
+            if position is None:
+                # New track, possibly of a face whose track has expired
+                positions[index] = len(self._live) + len(new_tracks)
+                new_tracks.append(len(self._states))
+                self._states.append(TrackState.ACTIVE)
+                self._identities.append(new_tracks[-1] if continued[index] is None
+                                        else self._identities[continued[index]])
+
+        if new_tracks:
+            self._live = np.concatenate((self._live, new_tracks))
+            self._live_last_frames = np.concatenate((self._live_last_frames, np.empty(len(new_tracks), dtype=np.int64)))
+
+            new_features = np.empty((len(new_tracks),) + features.shape[1:], dtype=features.dtype)
+            self._live_features = new_features if self._live_features is None else np.concatenate(
+                (self._live_features, new_features))
+
+        # Update the tracks with the faces found
+        self._live_last_frames[positions] = frame_index
+        self._store(positions, features, new)
+
+        track_indices = self._live[positions]
+        for track_index in track_indices.tolist():
+            self._states[track_index] = TrackState.ACTIVE
+
+        return track_indices
+
+    def update(self, frame_index, faces, encodings=None):
+        # Same as assign(), but for Box objects, keeping them in the tracks
+        track_indices = self.assign(frame_index, fb_box.to_array(faces), encodings).tolist()
+
+        while len(self._tracks) < len(self._states):
+            self._tracks.append([])
 
         frame = []
+        for face, track_index in zip(faces, track_indices):
+            self._tracks[track_index].append(face)
+            frame.append((face, track_index))
+
+        return frame
+
+
+class IouTracker(Tracker):
+    def __init__(self, min_overlap=IOU_MIN_OVERLAP, max_frame_distance=None, grid=fb_index.GRID, prediction=False,
+                 max_continue_distance=None):
+        super().__init__(max_frame_distance, max_continue_distance)
+
+        # min_overlap is in %
+        self._min_overlap = min_overlap / 100
+
+        # Spatial index of the most recent boxes of the live tracks, so that faces are
+        # compared only against the tracks nearby. 0 compares against all of them
+        self._grid = grid
+
+        # Compare against where the faces are predicted to have moved to (constant velocity Kalman filter),
+        # instead of where they were last found, so that fast moving faces stay in the same track
+        self._prediction = prediction
+
+        # Kalman filter state of the live tracks predicted for the current frame
+        self._predicted = None
+
+    def _features(self, boxes, encodings):
+        if not self._prediction:
+            return boxes
+
+        # A new track is where it was found (with the detection noise) and not moving (with any speed)
+        return np.concatenate((
+            boxes,
+            np.zeros_like(boxes),
+            np.tile([_KALMAN_MEASUREMENT_VARIANCE, 0, _KALMAN_VELOCITY_VARIANCE], (len(boxes), 1))), axis=1)
+
+    def _create_index(self, boxes):
+        return fb_index.GridIndex(self._grid) if self._grid else None
+
+    def predict(self, frame_index):
+        # Indices of the live tracks and their boxes predicted for a frame (N x 4).
+        # Where they were last found if not predicting
+        if self._live_features is None:
+            return self._live, np.empty((0, 4))
+
+        if not self._prediction:
+            return self._live, self._live_features
+
+        return self._live, _kalman_predict(self._live_features, frame_index - self._live_last_frames)[:, :4]
+
+    def _match(self, frame_index, features):
+        self._predicted = None
+
+        if self._live_features is None or not len(self._live_features):
+            return [None] * len(features)
+
+        boxes = features[:, :4]
+        tracked = self._live_features
+
+        if self._prediction:
+            self._predicted = _kalman_predict(self._live_features, frame_index - self._live_last_frames)
+            tracked = self._predicted[:, :4]
+
+            if self._index is not None:
+                # Look for the faces around the predicted boxes
+                self._index.update(range(len(tracked)), tracked)
+
+        # Compare against the most recent (or predicted) box of each track
+        if self._index is None:
+            return self._match_all(boxes, tracked)
+
+        rows, cols = self._candidates(boxes)
+        scores = fb_box.intersection_over_union(boxes[rows], tracked[cols])
 
-        if faces:
-            tracked_encodings = [track[-1][1] for track in tracks]
+        return self._assign_scores(len(boxes), rows, cols, scores)
 
-            for index in range(len(faces)):
-                face = faces[index]
-                encoding = encodings[index]
+    def _match_all(self, features, tracked):
+        # All faces x tracks
+        scores = fb_box.intersection_over_union(features[:, None, :4], tracked[None, :, :4])
+        rows, cols = np.nonzero(scores)
 
-                distances = face_recognition.face_distance(tracked_encodings, encoding)
-                distances = [(x, d) for x, d in enumerate(distances)]
-                distances = sorted(distances, key=lambda d: d[1])
+        return self._assign_scores(len(features), rows, cols, scores[rows, cols])
 
-                if not distances or distances[0][1] > encoding_max_distance:
-                    # Either nothing to compare against (new), or too different
-                    # New track
-                    track_index = len(tracks)
-                    tracks.append([])
-                else:
-                    track_index = distances[0][0]
+    def _assign_scores(self, count, rows, cols, scores):
+        accepted = (scores > 0) & (scores >= self._min_overlap)
+        assigned = _assign_pairs(rows[accepted], cols[accepted], -scores[accepted])
 
-                tracks[track_index].append((face, encoding))
-                frame.append((face, track_index))
+        return [assigned.get(index) for index in range(count)]
+
+    def _store(self, positions, features, new):
+        if self._predicted is not None and not new.all():
+            # Correct the predictions for the tracks that were found
+            positions = np.asarray(positions)
+            features = features.copy()
+            features[~new] = _kalman_correct(self._predicted[positions[~new]], features[~new, :4])
+
+        super()._store(positions, features, new)
+
+
+class EncodingTracker(Tracker):
+    def __init__(self, encoding_max_distance=ENCODING_MAX_DISTANCE, max_frame_distance=None,
+                 encoding_smoothing=ENCODING_SMOOTHING, encoding_index=False, max_continue_distance=None):
+        super().__init__(max_frame_distance, max_continue_distance)
+
+        # encoding_max_distance is in %
+        self._encoding_max_distance = encoding_max_distance / 100
+
+        # encoding_smoothing is in %
+        self._encoding_smoothing = encoding_smoothing / 100
+
+        # Approximate nearest neighbour index of the live tracks, so that faces are compared
+        # only against similar tracks. Useful when a lot of faces are visible at the same time.
+        # Faces that would start new tracks are still compared against all the recently expired tracks
+        self._encoding_index = encoding_index
+
+    def _features(self, boxes, encodings):
+        assert len(boxes) == len(encodings)
+        return np.asarray(encodings, dtype=np.float32)
+
+    def _match(self, frame_index, encodings):
+        if self._live_features is None or not len(self._live_features):
+            return [None] * len(encodings)
+
+        if self._index is not None:
+            # Compare only against the candidates from the index
+            rows, cols = self._candidates(encodings)
+            distances = np.linalg.norm(self._live_features[cols] - encodings[rows], axis=1)
+
+            # Closest first. Too different faces start new tracks
+            accepted = distances <= self._encoding_max_distance
+            assigned = _assign_pairs(rows[accepted], cols[accepted], distances[accepted])
+
+            return [assigned.get(index) for index in range(len(encodings))]
+
+        return self._match_all(encodings, self._live_features)
+
+    def _match_all(self, encodings, tracked):
+        # Euclidean distance (same as face_recognition.face_distance()) of faces x tracks
+        # in a single matrix multiplication: |a - b|^2 = |a|^2 + |b|^2 - 2ab
+        distances = (np.einsum("ij,ij->i", encodings, encodings)[:, None]
+                     + np.einsum("ij,ij->i", tracked, tracked)[None, :]
+                     - 2 * encodings @ tracked.T)
+        distances = np.sqrt(np.maximum(distances, 0))
+
+        # Closest first. Too different faces start new tracks
+        assigned = _assign(distances, distances <= self._encoding_max_distance)
+
+        return [assigned.get(index) for index in range(len(encodings))]
+
+    def _store(self, positions, features, new):
+        if self._encoding_smoothing:
+            # Running (exponential) mean of the encodings of the track, which is more robust
+            # to a single bad encoding (e.g. a blurry face) than the most recent one
+            previous = self._live_features[positions]
+            smoothed = self._encoding_smoothing * previous + (1 - self._encoding_smoothing) * features
+            features = np.where(new[:, None], features, smoothed)
+
+        super()._store(positions, features, new)
+
+    def _create_index(self, encodings):
+        return fb_index.LshIndex(encodings.shape[1], self._encoding_max_distance) if self._encoding_index else None
+
+
+def track_faces_iou(frames, min_overlap=IOU_MIN_OVERLAP, max_frame_distance=None, grid=fb_index.GRID):
+    tracker = IouTracker(min_overlap, max_frame_distance, grid)
+    frames_with_tracks = [tracker.update(frame_index, faces) for frame_index, faces in enumerate(frames)]
+    return tracker.tracks, frames_with_tracks
+
+
+def track_faces_encodings(frames, encodings_for_frames, encoding_max_distance=ENCODING_MAX_DISTANCE,
+                          max_frame_distance=None, encoding_smoothing=ENCODING_SMOOTHING, encoding_index=False):
+    assert len(frames) == len(encodings_for_frames)
+
+    tracker = EncodingTracker(encoding_max_distance, max_frame_distance, encoding_smoothing, encoding_index)
+    frames_with_tracks = [
+        tracker.update(frame_index, faces, encodings)
+        for frame_index, (faces, encodings) in enumerate(zip(frames, encodings_for_frames))]
+
+    return tracker.tracks, frames_with_tracks
+
+
+def track_faces(table: fb_table.FaceTable, tracker: Tracker):
+    # Returns the table with the track index of each face
+    tracks = []
+    for frame_index in range(table.frame_count):
+        faces = table.frame(frame_index)
+        tracks.append(tracker.assign(frame_index, faces.boxes, faces.encodings))
 
-        frames_with_tracks.append(frame)
+    return table.with_tracks(np.concatenate(tracks) if tracks else None)
 
-    # Remove the face encodings from the tracks
-    tracks = [[t[0] for t in track] for track in tracks]
 
-    return tracks, frames_with_tracks
+def filter_tracks(table: fb_table.FaceTable, min_track_size, identities=None):
+    # Only the faces from tracks with at least min_track_size faces.
+    # With identities (Tracker.identities), tracks continuing expired ones count the faces of all of them
+    tracks = table.tracks if identities is None else np.asarray(identities, dtype=np.int64)[table.tracks]
+    track_sizes = np.bincount(tracks, minlength=1)
+    return table.select(track_sizes[tracks] >= min_track_size)
 
 
 def filter_frames_with_tracks(tracks, frames_with_tracks, min_track_size):
@@ -7,13 +7,70 @@ import os
 import faceblur.app as fb_app
 import faceblur.av.container as fb_container
 import faceblur.av.video as fb_video
+import faceblur.faces.cascade as fb_cascade
 import faceblur.faces.dlib as fb_dlib
 import faceblur.faces.mediapipe as fb_mediapipe
 import faceblur.faces.mode as fb_mode
 import faceblur.faces.model as fb_model
 import faceblur.faces.obfuscate as fb_obfuscate
+import faceblur.faces.registry as fb_registry
 import faceblur.help as fb_help
 import faceblur.image as fb_image
+import faceblur.schedule as fb_schedule
+
+
+def _parse_output(parser, spec, mode, mode_options, image, video):
+    # key=value pairs separated by commas, e.g. output=review,mode=DEBUG,video-format=mkv
+    try:
+        values = dict(item.split("=", 1) for item in spec.split(","))
+    except ValueError:
+        parser.error(f"argument --extra-output: invalid output '{spec}'")
+
+    choices = {
+        "mode": list(fb_mode.Mode),
+        "backend": list(fb_obfuscate.Backend),
+        "image-format": list(fb_image.FORMATS.keys()),
+        "video-format": list(fb_container.FORMATS.keys()),
+    }
+
+    for key, value in values.items():
+        if key not in ["output", "strength", "video-encoder"] + list(choices):
+            parser.error(f"argument --extra-output: unknown option '{key}'")
+
+        if key in choices and value not in choices[key]:
+            parser.error(f"argument --extra-output: invalid {key}: '{value}' (choose from {', '.join(choices[key])})")
+
+    if "output" not in values:
+        parser.error(f"argument --extra-output: missing output in '{spec}'")
+
+    output = {
+        "output": values["output"],
+        "image_options": image | {"format": values.get("image-format", image["format"])},
+        "video_options": video | {
+            "format": values.get("video-format", video["format"]),
+            "encoder": values.get("video-encoder", video["encoder"]),
+        },
+    }
+
+    if "mode" in values:
+        output["mode"] = values["mode"]
+
+    mode = values.get("mode", mode)
+    output["mode_options"] = dict(mode_options)
+
+    if "strength" in values:
+        if mode in fb_obfuscate.MODES and mode != fb_mode.Mode.SOLID:
+            output["mode_options"]["strength"] = int(values["strength"])
+        else:
+            parser.error(f"argument --extra-output: strength is not valid for mode {mode}")
+
+    if "backend" in values:
+        if mode in fb_obfuscate.MODES:
+            output["mode_options"]["backend"] = values["backend"]
+        else:
+            parser.error(f"argument --extra-output: backend is not valid for mode {mode}")
+
+    return output
 
 
 def main():
@@ -30,7 +87,7 @@ def main():
                         help=f"{fb_help.OUTPUT}. Defaults to {fb_app.DEFAULT_OUT}.")
 
     parser.add_argument("--model", "-m",
-                        choices=list(fb_model.Model),
+                        choices=list(fb_registry.DETECTORS),
                         default=fb_model.DEFAULT,
                         help=fb_help.MODEL)
 
@@ -42,6 +99,14 @@ def main():
                         type=int,
                         help=fb_help.MODEL_DLIB_UPSCALING)
 
+    parser.add_argument("--model-roi-interval",
+                        type=int,
+                        help=fb_help.MODEL_ROI_INTERVAL)
+
+    parser.add_argument("--model-roi-margin",
+                        type=int,
+                        help=fb_help.MODEL_ROI_MARGIN)
+
     parser.add_argument("--disable-tracking",
                         action="store_true",
                         help="Disable face tracking for videos. On by default.")
@@ -50,10 +115,22 @@ def main():
                         type=int,
                         help=fb_help.TRACKING_MINIMUM_IOU)
 
+    parser.add_argument("--tracking-prediction",
+                        action="store_true",
+                        help=fb_help.TRACKING_PREDICTION)
+
     parser.add_argument("--tracking-max-encoding-distance",
                         type=int,
                         help=fb_help.TRACKING_MAX_FACE_ENCODING_DISTANCE)
 
+    parser.add_argument("--tracking-encoding-smoothing",
+                        type=int,
+                        help=fb_help.TRACKING_ENCODING_SMOOTHING)
+
+    parser.add_argument("--tracking-encoding-index",
+                        action="store_true",
+                        help=fb_help.TRACKING_ENCODING_INDEX)
+
     parser.add_argument("--tracking-duration",
                         type=float,
                         help=fb_help.TRACKING_DURATION)
@@ -71,6 +148,14 @@ def main():
                         type=int,
                         help=fb_help.BLUR_STRENGTH)
 
+    parser.add_argument("--backend",
+                        choices=list(fb_obfuscate.Backend),
+                        help=fb_help.BACKEND)
+
+    parser.add_argument("--patch-reuse",
+                        type=int,
+                        help=fb_help.PATCH_REUSE)
+
     parser.add_argument("--image-format", "-f",
                         choices=sorted(list(fb_image.FORMATS.keys())),
                         help=fb_help.IMAGE_FORMAT)
@@ -79,9 +164,19 @@ def main():
                         choices=sorted(list(fb_container.FORMATS.keys())),
                         help=fb_help.VIDEO_FORMAT)
 
-    parser.add_argument("--video-encoder", "-V", choices=fb_video.ENCODERS,
+    # Not using choices, as enumerating the encoders is slow and would be done on every start
+    parser.add_argument("--video-encoder", "-V",
                         help=fb_help.VIDEO_ENCODER)
 
+    parser.add_argument("--extra-output",
+                        action="append",
+                        help=fb_help.EXTRA_OUTPUT)
+
+    parser.add_argument("--schedule",
+                        choices=list(fb_schedule.Policy),
+                        default=fb_schedule.DEFAULT,
+                        help=fb_help.SCHEDULE)
+
     parser.add_argument("--thread-type", "-t",
                         choices=fb_video.THREAD_TYPES,
                         default=fb_video.DEFAULT_THREAD_TYPE,
@@ -97,33 +192,44 @@ def main():
 
     args = parser.parse_args()
 
+    if args.video_encoder is not None and args.video_encoder not in fb_video.get_encoders():
+        parser.error(f"argument --video-encoder/-V: invalid choice: '{args.video_encoder}' "
+                     f"(choose from {', '.join(fb_video.get_encoders())})")
+
     # Fix the params
 
     # Model options
     model_options = {}
 
     if args.model_confidence is not None:
-        if args.model in fb_mediapipe.MODELS:
+        if args.model in fb_mediapipe.MODELS + fb_cascade.MODELS:
             model_options["confidence"] = args.model_confidence
         else:
             parser.error(f"model {args.model} does not support --model-confidence")
 
     if args.model_upscaling is not None:
-        if args.model in fb_dlib.MODELS:
+        if args.model in fb_dlib.MODELS + fb_cascade.MODELS:
             model_options["upscale"] = args.model_upscaling
         else:
             parser.error(f"model {args.model} does not support --model-upscaling")
 
+    if args.model_roi_interval is not None:
+        model_options["roi_interval"] = args.model_roi_interval
+
+    if args.model_roi_margin is not None:
+        model_options["roi_margin"] = args.model_roi_margin
+
     # Face tracking
     if args.disable_tracking:
         tracking_args = [
             args.tracking_min_iou,
             args.tracking_max_encoding_distance,
+            args.tracking_encoding_smoothing,
             args.tracking_duration,
             args.tracking_min_face_duration,
         ]
 
-        if any(t is not None for t in tracking_args):
+        if any(t is not None for t in tracking_args) or args.tracking_prediction or args.tracking_encoding_index:
             parser.error(f"Providing tracking options has no effect when tracking is disabled")
 
         tracking_options = False
@@ -136,14 +242,32 @@ def main():
             else:
                 parser.error(f"IoU tracking is not supported for model {args.model}")
 
+        if args.tracking_prediction:
+            if args.model in fb_mediapipe.MODELS:
+                tracking_options["prediction"] = True
+            else:
+                parser.error(f"Tracking prediction is not supported for model {args.model}")
+
         if args.tracking_max_encoding_distance is not None:
-            if args.model in fb_dlib.MODELS:
+            if args.model in fb_dlib.MODELS + fb_cascade.MODELS:
                 tracking_options["score"] = args.tracking_max_encoding_distance
             else:
                 parser.error(f"Face encoding tracking is not supported for model {args.model}")
 
+        if args.tracking_encoding_smoothing is not None:
+            if args.model in fb_dlib.MODELS + fb_cascade.MODELS:
+                tracking_options["encoding_smoothing"] = args.tracking_encoding_smoothing
+            else:
+                parser.error(f"Face encoding tracking is not supported for model {args.model}")
+
+        if args.tracking_encoding_index:
+            if args.model in fb_dlib.MODELS + fb_cascade.MODELS:
+                tracking_options["encoding_index"] = True
+            else:
+                parser.error(f"Face encoding tracking is not supported for model {args.model}")
+
         if args.tracking_duration is not None:
-            tracking_options["tracking_durtaion"] = args.tracking_duration
+            tracking_options["tracking_duration"] = args.tracking_duration
 
         if args.tracking_min_face_duration is not None:
             tracking_options["min_face_duration"] = args.tracking_min_face_duration
@@ -152,11 +276,25 @@ def main():
     mode_options = {}
 
     if args.strength is not None:
-        if args.mode in fb_obfuscate.MODES:
+        if args.mode in fb_obfuscate.MODES and args.mode != fb_mode.Mode.SOLID:
             mode_options["strength"] = args.strength
         else:
             parser.error(f"--strength is not valid for mode {args.mode}")
 
+    if args.backend is not None:
+        if args.mode in fb_obfuscate.MODES:
+            mode_options["backend"] = args.backend
+        else:
+            parser.error(f"--backend is not valid for mode {args.mode}")
+
+    if args.patch_reuse is not None:
+        if args.backend == fb_obfuscate.Backend.NUMPY:
+            parser.error(f"--patch-reuse is not supported for backend {args.backend}")
+        elif args.mode in [fb_mode.Mode.RECT_BLUR, fb_mode.Mode.GRACEFUL_BLUR]:
+            mode_options["patch_reuse"] = args.patch_reuse
+        else:
+            parser.error(f"--patch-reuse is not valid for mode {args.mode}")
+
     # Image options
     image = {
         "format": args.image_format,
@@ -168,6 +306,12 @@ def main():
         "encoder": args.video_encoder,
     }
 
+    # Extra outputs (the first one is the default one)
+    outputs = None
+    if args.extra_output:
+        outputs = [{}] + [_parse_output(parser, spec, args.mode, mode_options, image, video)
+                          for spec in args.extra_output]
+
     threads = {
         "thread_type": args.thread_type,
         "threads": args.threads,
@@ -183,7 +327,9 @@ def main():
         "mode_options": mode_options,
         "image_options": image,
         "video_options": video,
+        "outputs": outputs,
         "thread_options": threads,
+        "schedule": args.schedule,
         "verbose": args.verbose,
     }
 
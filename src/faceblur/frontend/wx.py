@@ -8,11 +8,14 @@ import wx
 
 import faceblur.app as fb_app
 import faceblur.help as fb_help
+import faceblur.faces.cascade as fb_cascade
+import faceblur.faces.detector as fb_detector
 import faceblur.faces.dlib as fb_dlib
 import faceblur.faces.mediapipe as fb_mediapipe
 import faceblur.faces.mode as fb_mode
 import faceblur.faces.model as fb_model
 import faceblur.faces.obfuscate as fb_obfuscate
+import faceblur.faces.registry as fb_registry
 import faceblur.faces.process as fb_process
 import faceblur.faces.track as fb_track
 import faceblur.progress as fb_progress
@@ -43,8 +46,12 @@ class ProgressWrapper(fb_progress.Progress):
     def __init__(self, progress, status):
         self._progress = progress
         self._status = status
+        self._description = None
+        self._postfix = None
 
     def __call__(self, desc=None, total=None, leave=True, unit=None):
+        self._description = desc
+        self._postfix = None
         wx.CallAfter(self._set_all, total, desc)
         return self
 
@@ -54,7 +61,19 @@ class ProgressWrapper(fb_progress.Progress):
         self._status.GetParent().Layout()
 
     def set_description(self, description):
-        wx.CallAfter(self._set_status, description)
+        self._description = description
+        wx.CallAfter(self._set_status, self._get_status())
+
+    def set_postfix_str(self, s="", refresh=True):
+        # e.g. the estimated time remaining
+        self._postfix = s
+        wx.CallAfter(self._set_status, self._get_status())
+
+    def _get_status(self):
+        if self._postfix:
+            return f"{self._description} ({self._postfix})" if self._description else self._postfix
+
+        return self._description
 
     def _set_status(self, status):
         self._status.SetLabel(status if status else "")
@@ -205,7 +224,7 @@ class MainWindow(wx.Frame):
         options_sizer.Add(model_options_sizer, flag=wx.ALL | wx.EXPAND, border=10)
 
         self._model = wx.ComboBox(
-            model_options_panel, value=fb_model.DEFAULT, choices=list(fb_model.Model),
+            model_options_panel, value=fb_model.DEFAULT, choices=list(fb_registry.DETECTORS),
             style=wx.CB_READONLY | wx.CB_DROPDOWN)
         self._model.Bind(wx.EVT_COMBOBOX, self._update_model_options)
         add_element(self._model, model_options_panel, model_options_sizer, "Detection model", fb_help.MODEL)
@@ -220,6 +239,11 @@ class MainWindow(wx.Frame):
         add_element(self._dlib_upscale, model_options_panel, model_options_sizer,
                     self._dlib_upscale_label, fb_help.MODEL_DLIB_UPSCALING)
 
+        self._roi_interval_label = wx.StaticText(model_options_panel, label="Full frame scan interval (frames)")
+        self._roi_interval = wx.SpinCtrl(model_options_panel, value=str(fb_detector.ROI_INTERVAL), min=0, max=1000)
+        add_element(self._roi_interval, model_options_panel, model_options_sizer,
+                    self._roi_interval_label, fb_help.MODEL_ROI_INTERVAL)
+
         # Panel containg tracking options
         tracking_options_panel = wx.StaticBox(right_panel, label="Face tracking")
         tracking_options_sizer = wx.StaticBoxSizer(tracking_options_panel, wx.VERTICAL)
@@ -236,6 +260,10 @@ class MainWindow(wx.Frame):
         add_element(self._iou_min_overlap, tracking_options_panel, tracking_options_sizer,
                     self._iou_min_overlap_label, fb_help.TRACKING_MINIMUM_IOU)
 
+        self._prediction = wx.CheckBox(tracking_options_panel, label="Predict face motion")
+        self._prediction.SetToolTip(wx.ToolTip(fb_help.TRACKING_PREDICTION))
+        tracking_options_sizer.Add(self._prediction, 0, wx.EXPAND | wx.ALL, 5)
+
         self._encoding_max_distance_label = wx.StaticText(tracking_options_panel, label="Max encoding distance (%)")
         self._encoding_max_distance = wx.SpinCtrlDouble(
             tracking_options_panel, value=str(fb_track.ENCODING_MAX_DISTANCE))
@@ -258,6 +286,7 @@ class MainWindow(wx.Frame):
         self._tracking_controls = [
             self._iou_min_overlap_label,
             self._iou_min_overlap,
+            self._prediction,
             self._encoding_max_distance_label,
             self._encoding_max_distance,
             self._min_track_face_duration_label,
@@ -269,11 +298,25 @@ class MainWindow(wx.Frame):
         mp_controls = [
             self._mp_confidence_label,
             self._mp_confidence,
+            self._roi_interval_label,
+            self._roi_interval,
             self._iou_min_overlap_label,
             self._iou_min_overlap,
+            self._prediction,
         ]
 
         dlib_controls = [
+            self._dlib_upscale_label,
+            self._dlib_upscale,
+            self._roi_interval_label,
+            self._roi_interval,
+            self._encoding_max_distance_label,
+            self._encoding_max_distance,
+        ]
+
+        cascade_controls = [
+            self._mp_confidence_label,
+            self._mp_confidence,
             self._dlib_upscale_label,
             self._dlib_upscale,
             self._encoding_max_distance_label,
@@ -285,6 +328,7 @@ class MainWindow(wx.Frame):
             fb_model.Model.MEDIA_PIPE_FULL_RANGE: mp_controls,
             fb_model.Model.DLIB_HOG: dlib_controls,
             fb_model.Model.DLIB_CNN: dlib_controls,
+            fb_model.Model.CASCADE: cascade_controls,
         }
 
         # Modes
@@ -305,15 +349,44 @@ class MainWindow(wx.Frame):
         add_element(self._strength, mode_options_panel, mode_options_sizer,
                     self._strength_label, fb_help.BLUR_STRENGTH)
 
+        self._backend_label = wx.StaticText(mode_options_panel, label="Backend")
+        self._backend = wx.ComboBox(
+            mode_options_panel, value=fb_obfuscate.DEFAULT_BACKEND, choices=list(fb_obfuscate.Backend),
+            style=wx.CB_READONLY | wx.CB_DROPDOWN)
+        add_element(self._backend, mode_options_panel, mode_options_sizer, self._backend_label, fb_help.BACKEND)
+
+        self._patch_reuse_label = wx.StaticText(mode_options_panel, label="Reuse blurred faces (frames)")
+        self._patch_reuse = wx.SpinCtrl(mode_options_panel, value=str(fb_obfuscate.PATCH_REUSE), min=0, max=1000)
+        add_element(self._patch_reuse, mode_options_panel, mode_options_sizer,
+                    self._patch_reuse_label, fb_help.PATCH_REUSE)
+
         self._mode_options_controls = {
             fb_mode.Mode.DEBUG: [],
             fb_mode.Mode.RECT_BLUR: [
                 self._strength_label,
                 self._strength,
+                self._backend_label,
+                self._backend,
+                self._patch_reuse_label,
+                self._patch_reuse,
             ],
             fb_mode.Mode.GRACEFUL_BLUR: [
                 self._strength_label,
                 self._strength,
+                self._backend_label,
+                self._backend,
+                self._patch_reuse_label,
+                self._patch_reuse,
+            ],
+            fb_mode.Mode.PIXELATE: [
+                self._strength_label,
+                self._strength,
+                self._backend_label,
+                self._backend,
+            ],
+            fb_mode.Mode.SOLID: [
+                self._backend_label,
+                self._backend,
             ],
         }
 
@@ -423,12 +496,16 @@ Copyright (C) 2025, Simona Dimitrova"""
         self._model.SetValue(fb_model.DEFAULT)
         self._mp_confidence.SetValue(fb_mediapipe.CONFIDENCE)
         self._dlib_upscale.SetValue(1)
+        self._roi_interval.SetValue(fb_detector.ROI_INTERVAL)
         self._iou_min_overlap.SetValue(fb_track.IOU_MIN_OVERLAP)
+        self._prediction.SetValue(False)
         self._encoding_max_distance.SetValue(fb_track.ENCODING_MAX_DISTANCE)
         self._min_track_face_duration.SetValue(fb_process.MIN_FACE_DURATION)
         self._tracking_duration.SetValue(fb_process.TRACKING_DURATION)
         self._mode.SetValue(fb_mode.DEFAULT)
         self._strength.SetValue(fb_obfuscate.STRENGTH)
+        self._backend.SetValue(fb_obfuscate.DEFAULT_BACKEND)
+        self._patch_reuse.SetValue(fb_obfuscate.PATCH_REUSE)
         self._tracking.SetValue(True)
         self._on_tracking()
         self._update_model_options()
@@ -511,15 +588,27 @@ Copyright (C) 2025, Simona Dimitrova"""
         model_options = {}
         if self._model.GetValue() in fb_mediapipe.MODELS:
             model_options["confidence"] = self._mp_confidence.GetValue()
+            model_options["roi_interval"] = self._roi_interval.GetValue()
             tracking["score"] = self._iou_min_overlap.GetValue()
+            tracking["prediction"] = self._prediction.GetValue()
 
         if self._model.GetValue() in fb_dlib.MODELS:
+            model_options["upscale"] = self._dlib_upscale.GetValue()
+            model_options["roi_interval"] = self._roi_interval.GetValue()
+            tracking["score"] = self._encoding_max_distance.GetValue()
+
+        if self._model.GetValue() in fb_cascade.MODELS:
+            model_options["confidence"] = self._mp_confidence.GetValue()
             model_options["upscale"] = self._dlib_upscale.GetValue()
             tracking["score"] = self._encoding_max_distance.GetValue()
 
         mode_options = {}
         if self._mode.GetValue() in fb_obfuscate.MODES:
             mode_options["strength"] = self._strength.GetValue()
+            mode_options["backend"] = self._backend.GetValue()
+
+        if self._mode.GetValue() in [fb_mode.Mode.RECT_BLUR, fb_mode.Mode.GRACEFUL_BLUR]:
+            mode_options["patch_reuse"] = self._patch_reuse.GetValue()
 
         kwargs = {
             "inputs": self._file_list.GetItems(),
@@ -3,13 +3,17 @@
 import os
 
 import faceblur.av.video as fb_video
+import faceblur.faces.cascade as fb_cascade
+import faceblur.faces.detector as fb_detector
 import faceblur.faces.dlib as fb_dlib
 import faceblur.faces.mode as fb_mode
 import faceblur.faces.model as fb_model
 import faceblur.faces.mediapipe as fb_mediapipe
 import faceblur.faces.obfuscate as fb_obfuscate
 import faceblur.faces.process as fb_process
+import faceblur.faces.region as fb_region
 import faceblur.faces.track as fb_track
+import faceblur.schedule as fb_schedule
 
 
 APP = "A tool to obfuscate faces from photos and videos"
@@ -24,7 +28,8 @@ Detection models:
 * MEDIA_PIPE_SHORT_RANGE: Google MediaPipe, up to 2 metres;
 * MEDIA_PIPE_FULL_RANGE: Google MediaPipe, up to 5 metres;
 * DLIB_HOG: DLIB Hog model. Good detection quality. Supports upscaling;
-* DLIB_CNN: The best DLIB model, but extremely slow.
+* DLIB_CNN: The best DLIB model, but extremely slow;
+* CASCADE: MediaPipe finds candidate faces and DLIB CNN runs only around them (and on the full frame every few frames).
 
 Defaults to {fb_model.DEFAULT}
 """
@@ -36,7 +41,7 @@ Higher values find less faces, but produce less false positives.
 
 Defaults to {fb_mediapipe.CONFIDENCE}.
 
-Only used for MEDIA_PIPE models
+Only used for MEDIA_PIPE and CASCADE models
 """
 
 MODEL_DLIB_UPSCALING = f"""
@@ -46,7 +51,24 @@ Higher values find less faces, but produce less false positives.
 
 Defaults to {fb_dlib.UPSCALE}.
 
-Only used for DLIB models
+Only used for DLIB and CASCADE models
+"""
+
+MODEL_ROI_INTERVAL = f"""
+How often (in frames) to scan the full frame. In between, detection runs only around the faces found last,
+which is faster and finds small faces better, but new faces are found only on the next full scan.
+0 scans every full frame (for CASCADE models it runs the slow model on every full frame, i.e. without candidates).
+
+Defaults to {fb_detector.ROI_INTERVAL} (and {fb_cascade.INTERVAL} for CASCADE models).
+"""
+
+MODEL_ROI_MARGIN = f"""
+How much to enlarge the regions around the last found faces (in percent of the face size on each side).
+Higher values follow faster moving faces, but are slower.
+
+Defaults to {fb_region.MARGIN}.
+
+Only used when not scanning full frames
 """
 
 TRACKING = f"""
@@ -65,6 +87,15 @@ Defaults to {fb_track.IOU_MIN_OVERLAP}.
 Only used for MEDIA_PIPE models
 """
 
+TRACKING_PREDICTION = f"""
+Predict where faces move to (assuming they keep moving with the same speed) and compare new faces against the
+predicted face boxes instead of where faces were last found. Keeps fast moving faces in the same track.
+
+Off by default.
+
+Only used for MEDIA_PIPE models
+"""
+
 TRACKING_MAX_FACE_ENCODING_DISTANCE = f"""
 Uses a more robust face tracking heuristic: distance between face encodings, i.e. how similar the faces must be (in percent).
 A face encoding is generated from the found face features (e.g. nose, eyes, etc.) so that it can more robustly match faces in separate frames.
@@ -72,7 +103,27 @@ Lower values create more unique tracks, while higher values bin more faces into
 
 Defaults to {fb_track.ENCODING_MAX_DISTANCE}.
 
-Only used for DLIB models
+Only used for DLIB and CASCADE models
+"""
+
+TRACKING_ENCODING_SMOOTHING = f"""
+How much of the previous face encodings of a face track to keep when comparing new faces against it (in percent).
+0 compares against the most recent face encoding only. Higher values average over more faces, which is more robust
+to a single bad face encoding (e.g. of a blurry face), but slower to follow faces that change (e.g. turning around).
+
+Defaults to {fb_track.ENCODING_SMOOTHING}.
+
+Only used for DLIB and CASCADE models
+"""
+
+TRACKING_ENCODING_INDEX = f"""
+Compare new faces only against the face tracks with similar face encodings (found through an approximate index),
+instead of against all face tracks that are still tracked. Faster when a lot of faces are visible at the same time,
+e.g. crowds, but very rarely a face may not be matched to its face track.
+
+Off by default.
+
+Only used for DLIB and CASCADE models
 """
 
 TRACKING_DURATION = f"""
@@ -80,6 +131,9 @@ For how many seconds to track a unique face (face track). This is the amount of
 
 This is used to interpolate missing faces because of false negatives, either because the model could not find a face where there was one, or because the person's face was not visible (e.g. was occluded or was looking to the side).
 Higher values are able to fill big gaps for when faces have not been found, e.g. a person is looking to the side for several seconds.
+Face tracks that have not been found for longer are no longer tracked and a new face track is started
+if the face is found again. The gap between them is not interpolated, but if the face is found again within
+the minimum face duration, the new face track still counts as the same face for it.
 
 Defaults to {fb_process.TRACKING_DURATION}
 """
@@ -87,6 +141,8 @@ Defaults to {fb_process.TRACKING_DURATION}
 TRACKING_MIN_FACE_DURATION = f"""
 What is the minimum amount of seconds for a particular unique face (face track) needed to include the face in the output of detected faces.
 This is used to filter out false positives: faces that the model found but were not really faces, e.g. vegetation.
+Faces found again after the tracking duration (but within the minimum face duration after that) start a new face
+track, but the duration of the face track before it is included too.
 
 Defaults to {fb_process.MIN_FACE_DURATION}
 """
@@ -96,16 +152,43 @@ Modes of operation:
 
 * RECT_BLUR: Uses gaussian blur directly on the face rects. Does not look very nice as it produces rectangular blurred boxes.
 * GRACEFUL_BLUR: Uses gaussian blur on the faces, but then applies gradual oval masks to create a more natural look.
+* PIXELATE: Replaces the faces with big blocks of their average colour. Faster than blurring for big faces.
+* SOLID: Covers the faces with solid boxes. The fastest.
 * DEBUG: Dumps found faces into a JSON file (one for each input) and then draws the found face boxes onto output. Red for the original boxes, blue for the processed faces.
+  For videos, the JSON file also has all detections of the model (with their scores, if provided by the model),
+  including the ones below the requested confidence.
 
 Defaults to {fb_model.DEFAULT}"""
 
 BLUR_STRENGTH = f"""
 Specify the strength of the obfuscation (in percent).
+For PIXELATE it scales the size of the blocks ({fb_obfuscate.PIXELATE_BLOCKS} blocks across a face at 100 percent).
 
 Defaults to {fb_obfuscate.STRENGTH}.
 
-Only used for blurring modes
+Only used for blurring and PIXELATE modes
+"""
+
+BACKEND = f"""
+How to obfuscate the faces in video frames:
+
+* PIL: Crops, blurs and pastes back each face as a separate image.
+* NUMPY: Obfuscates the faces in place on the pixels of the frame, blending the blurred faces back in a single step.
+  Does not support reusing blurred faces.
+
+Defaults to {fb_obfuscate.DEFAULT_BACKEND}.
+
+Only used for videos
+"""
+
+PATCH_REUSE = f"""
+Reuse the blurred face of a tracked face in the next frames (up to this many), as long as the face has not moved
+(by more than {fb_obfuscate.PATCH_TOLERANCE} pixels) and looks the same. Speeds up videos with static faces,
+e.g. a seated speaker filmed with a fixed camera.
+
+Defaults to {fb_obfuscate.PATCH_REUSE} (never reuse).
+
+Only used for RECT_BLUR and GRACEFUL_BLUR with face tracking, and only for videos
 """
 
 IMAGE_FORMAT = """
@@ -121,14 +204,35 @@ If not speciefied it will use the same container as each input
 """
 
 VIDEO_ENCODER = """
-Specifies the encoder for video files.
+Specifies the encoder for video files. Any video encoder supported by FFmpeg, e.g. libx264.
 
 If not speciefied it will use the same codec as each input video"""
 
+EXTRA_OUTPUT = """
+Also write the inputs to another output, finding the faces only once and decoding each video only once.
+Given as comma separated options, e.g. output=review,mode=DEBUG or output=mkv,video-format=mkv,video-encoder=libx264.
+
+Supported options are output (required), mode, strength, backend, image-format, video-format and video-encoder.
+The options not given are the same as for the main output.
+
+Can be used more than once
+"""
+
+SCHEDULE = f"""
+In what order to process the inputs, by an estimate of the work for each of them (pixels for images,
+pixels times frames for videos):
+
+* INPUT: Sorted by filename.
+* SHORTEST_FIRST: The quickest ones first, e.g. the photos before a long video.
+* LARGEST_FIRST: The longest ones first, e.g. to split the work evenly when running several instances.
+
+Defaults to {fb_schedule.DEFAULT}
+"""
+
 THREAD_TYPE = f"PyAV decoder/encoder threading model. Defaults to {fb_video.DEFAULT_THREAD_TYPE}"
 
 THREADS = f"""
-How many threads to use for face detection, video decoding/encoding.
+How many threads to use for face detection, video decoding/encoding and blurring faces.
 
 Defaults to the number of logical cores: {os.cpu_count()}
 """
@@ -1,9 +1,8 @@
 # Copyright (C) 2025, Simona Dimitrova
 
-from PIL import Image, ImageOps
-from pillow_heif import register_heif_opener
+import functools
 
-register_heif_opener()
+from PIL import Image, ImageOps
 
 FORMATS = {
     "bmp": ["bmp"],
@@ -47,7 +46,16 @@ FORMATS = {
 EXTENSIONS = sorted(list(set([ext for format in FORMATS.values() for ext in format])))
 
 
+@functools.cache
+def _register_heif_opener():
+    # pillow_heif is slow to import, so do it only when actually opening images
+    from pillow_heif import register_heif_opener
+    register_heif_opener()
+
+
 def image_open(filename):
+    _register_heif_opener()
+
     image = Image.open(filename)
 
     # mediapipe's models support RGB only, which will fail for RGBA PNGs.
@@ -60,3 +68,11 @@ def image_open(filename):
     image = ImageOps.exif_transpose(image)
 
     return image
+
+
+def image_size(filename):
+    # (width, height) reading only the header of the file (ignoring any EXIF rotation)
+    _register_heif_opener()
+
+    with Image.open(filename) as image:
+        return image.size
@@ -1,6 +1,16 @@
 # Copyright (C) 2025, Simona Dimitrova
 
 import os
+import shutil
+
+try:
+    import fcntl
+except ImportError:
+    # Not on Windows
+    fcntl = None
+
+# ioctl to share the data of a file with another one (copy-on-write), e.g. on Btrfs and XFS
+FICLONE = 0x40049409
 
 
 def is_filename_from_ext_group(filename, group):
@@ -24,3 +34,19 @@ def walk_files(path, skipped=[]):
                 files.append(filename)
 
     return files
+
+
+def copy_file(source, destination):
+    # Returns how the file was copied: "reflink" (sharing the data until either of them changes) or "copy".
+    # Not a hard link, as changing the destination in place would change the source too
+    if fcntl is not None:
+        try:
+            with open(source, "rb") as source_file, open(destination, "wb") as destination_file:
+                fcntl.ioctl(destination_file.fileno(), FICLONE, source_file.fileno())
+            return "reflink"
+        except OSError:
+            # Not supported by the file system (or across file systems)
+            pass
+
+    shutil.copyfile(source, destination)
+    return "copy"
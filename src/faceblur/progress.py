@@ -11,6 +11,9 @@ class Progress:
     def update(self, n=1):
         pass
 
+    def set_postfix_str(self, s="", refresh=True):
+        pass
+
     def __enter__(self):
         return self
 
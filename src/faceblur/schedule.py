@@ -0,0 +1,97 @@
+# Copyright (C) 2025, Simona Dimitrova
+
+import av
+import logging
+import time
+
+import faceblur.av.container as fb_container
+import faceblur.image as fb_image
+import faceblur.path as fb_path
+
+from enum import StrEnum
+
+
+class Policy(StrEnum):
+    INPUT = "INPUT"
+    SHORTEST_FIRST = "SHORTEST_FIRST"
+    LARGEST_FIRST = "LARGEST_FIRST"
+
+
+DEFAULT = Policy.INPUT
+
+
+def _is_image(filename):
+    return fb_path.is_filename_from_ext_group(filename, fb_image.EXTENSIONS)
+
+
+def estimate_cost(filename):
+    # Pixels to go through: width x height for images, width x height x frames for videos.
+    # Only the headers are read, so that it is cheap compared to processing the file
+    try:
+        if _is_image(filename):
+            width, height = fb_image.image_size(filename)
+            return width * height
+
+        width, height, frames = fb_container.probe_video(filename)
+        return width * height * frames
+    except (OSError, ValueError, av.FFmpegError) as e:
+        # It will fail (with a proper error) when processed
+        logging.getLogger(__name__).debug(f"Could not estimate the cost of '{filename}': {e}")
+        return 0
+
+
+def schedule(filenames, costs, policy=DEFAULT):
+    # costs are {filename: cost}. Files of the same cost stay in input order
+    if policy == Policy.SHORTEST_FIRST:
+        return sorted(filenames, key=lambda filename: costs[filename])
+
+    if policy == Policy.LARGEST_FIRST:
+        return sorted(filenames, key=lambda filename: -costs[filename])
+
+    if policy == Policy.INPUT:
+        return list(filenames)
+
+    raise ValueError(f"Unsupported scheduling policy: {policy}")
+
+
+class Estimator:
+    # Time remaining from how long the pixels processed so far took. Separately for images and videos,
+    # as faces in videos are not searched for in the whole of every frame
+    def __init__(self, costs, clock=time.monotonic):
+        self._costs = costs
+        self._clock = clock
+        self._started = None
+
+        # Keyed by whether for images
+        self._remaining = {True: 0, False: 0}
+        self._done = {True: 0, False: 0}
+        self._elapsed = {True: 0.0, False: 0.0}
+
+        for filename, cost in costs.items():
+            self._remaining[_is_image(filename)] += cost
+
+    def start(self, filename):
+        self._started = self._clock()
+
+    def done(self, filename):
+        is_image = _is_image(filename)
+        self._remaining[is_image] -= self._costs[filename]
+        self._done[is_image] += self._costs[filename]
+        self._elapsed[is_image] += self._clock() - self._started
+
+    def remaining(self):
+        # In seconds, None if nothing was measured yet
+        if not any(self._done.values()):
+            return None
+
+        # Assume the same time per pixel for the other kind of files until one of them is done
+        rate = sum(self._elapsed.values()) / sum(self._done.values())
+        rates = {kind: self._elapsed[kind] / self._done[kind] if self._done[kind] else rate for kind in self._done}
+
+        return sum(self._remaining[kind] * rates[kind] for kind in self._remaining)
+
+
+def format_remaining(seconds):
+    minutes, seconds = divmod(round(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02}:{seconds:02} remaining" if hours else f"{minutes:02}:{seconds:02} remaining"
@@ -8,10 +8,17 @@ MODELS = {
         {},  # default (50)
         {"confidence": 25},
         {"confidence": 75},
+        {"roi_interval": 10},
     ],
 
     Model.DLIB_HOG: [
         {},  # default (1)
         {"upscale": 2},
+        {"roi_interval": 10},
+    ],
+
+    Model.CASCADE: [
+        {},  # default (every 30 frames)
+        {"roi_interval": 5},  # full frame more often
     ],
 }
@@ -0,0 +1,88 @@
+# Copyright (C) 2025, Simona Dimitrova
+
+import av
+import numpy as np
+import os
+import pytest
+
+import faceblur.app as fb_app
+
+from faceblur.av.video import VideoFrame
+from faceblur.faces.mode import Mode
+from faceblur.faces.obfuscate import Backend
+from faceblur.faces.table import FaceTable
+from fractions import Fraction
+
+
+def test_get_outputs():
+    outputs = fb_app._get_outputs("out", Mode.GRACEFUL_BLUR, {"strength": 50}, {"format": None}, {"format": None})
+    assert outputs == [{
+        "output": "out",
+        "mode": Mode.GRACEFUL_BLUR,
+        "mode_options": {"strength": 50},
+        "image_options": {"format": None},
+        "video_options": {"format": None},
+    }]
+
+    outputs = fb_app._get_outputs("out", Mode.GRACEFUL_BLUR, {"strength": 50}, {"format": None}, {"format": None}, [
+        {},
+        {"output": "review", "mode": Mode.DEBUG},
+        {"output": "mkv", "video_options": {"format": "mkv"}},
+    ])
+
+    assert [output["output"] for output in outputs] == ["out", "review", "mkv"]
+    assert [output["mode"] for output in outputs] == [Mode.GRACEFUL_BLUR, Mode.DEBUG, Mode.GRACEFUL_BLUR]
+    assert outputs[2]["video_options"] == {"format": "mkv"}
+    assert outputs[2]["mode_options"] == {"strength": 50}
+
+
+def test_create_outputs(tmp_path):
+    filenames = fb_app._create_outputs("video.mp4", [(tmp_path / "a", None), (tmp_path / "a", "mkv")])
+    assert filenames == [os.path.join(tmp_path / "a", "video.mp4"), os.path.join(tmp_path / "a", "video.mkv")]
+
+    # Same file for different outputs
+    with pytest.raises(ValueError):
+        fb_app._create_outputs("video.mp4", [(tmp_path / "a", None), (tmp_path / "a", "mp4")])
+
+
+def test_has_faces():
+    faces = FaceTable(1, [0], [[0.1, 0.2, 0.2, 0.1]])
+    empty = FaceTable(1, [], [])
+
+    assert fb_app._has_faces((faces, None), Mode.GRACEFUL_BLUR)
+    assert not fb_app._has_faces((empty, None), Mode.GRACEFUL_BLUR)
+
+    # Only the processed faces are obfuscated, but all are drawn
+    assert not fb_app._has_faces((faces, empty), Mode.GRACEFUL_BLUR)
+    assert fb_app._has_faces((faces, empty), Mode.DEBUG)
+    assert not fb_app._has_faces((empty, empty), Mode.DEBUG)
+
+
+def test_write_unchanged(tmp_path):
+    input_filename = tmp_path / "video.mp4"
+    input_filename.write_bytes(b"video")
+
+    # Same format: a copy of the file
+    output_filename = tmp_path / "out.mp4"
+    assert fb_app._write_unchanged(input_filename, output_filename) in ["copy", "reflink"]
+    assert output_filename.read_bytes() == b"video"
+
+    # New encoder or format (without a way to remux): must be encoded
+    assert fb_app._write_unchanged(input_filename, tmp_path / "encoder.mp4", encoder="libx264") is None
+    assert fb_app._write_unchanged(input_filename, tmp_path / "out.mkv") is None
+    assert fb_app._write_unchanged(input_filename, tmp_path / "out.mkv", remux=lambda: "remux") == "remux"
+
+
+def test_process_video_frame_numpy():
+    pixels = np.random.default_rng(0).integers(0, 256, (64, 64, 3), dtype=np.uint8)
+    decoded = av.VideoFrame.from_ndarray(pixels, format="rgb24")
+    decoded.pts = 0
+    decoded.time_base = Fraction(1, 25)
+
+    frame = VideoFrame(decoded)
+    faces = (FaceTable(1, [0], [[0.25, 0.75, 0.75, 0.25]]), None)
+
+    # Obfuscated in place, but only in the output. The decoded frame is shared by all outputs
+    output = fb_app._process_video_frame(frame, faces, Mode.RECT_BLUR, {}, backend=Backend.NUMPY)
+    assert not np.array_equal(output._frame.to_ndarray(format="rgb24"), pixels)
+    assert np.array_equal(frame.to_ndarray(), pixels)
@@ -0,0 +1,69 @@
+# Copyright (C) 2025, Simona Dimitrova
+
+import numpy as np
+
+import faceblur.box as fb_box
+
+from faceblur.box import Box
+
+
+def _random_boxes(rng, count):
+    positions = rng.uniform(-0.2, 1.0, (count, 2))
+    sizes = rng.uniform(0.01, 0.5, (count, 2))
+    return [Box(y, x + w, y + h, x) for (y, x), (h, w) in zip(positions.tolist(), sizes.tolist())]
+
+
+def test_box_slots():
+    box = Box(0.1, 0.2, 0.3, 0.1)
+    assert not hasattr(box, "__dict__")
+    assert box.to_json() == {"top": 0.1, "right": 0.2, "bottom": 0.3, "left": 0.1}
+    assert Box(0.1, 0.2, 0.3, 0.1, 0.5).to_json()["score"] == 0.5
+
+
+def test_box_normalise():
+    rng = np.random.default_rng(0)
+    boxes = _random_boxes(rng, 100)
+
+    expected = fb_box.to_array([box.normalise(640, 480) for box in boxes])
+    assert np.allclose(fb_box.normalise(fb_box.to_array(boxes), 640, 480), expected)
+
+
+def test_box_denormalise():
+    rng = np.random.default_rng(0)
+    boxes = _random_boxes(rng, 100)
+
+    denormalised = fb_box.denormalise(fb_box.to_array(boxes), 640, 480)
+    valid = fb_box.is_valid(denormalised)
+
+    for box, array, is_valid in zip(boxes, denormalised.tolist(), valid.tolist()):
+        expected = box.denormalise(640, 480)
+        if expected is None:
+            assert not is_valid
+        else:
+            assert is_valid
+            assert array == [expected.top, expected.right, expected.bottom, expected.left]
+
+
+def test_box_clip():
+    assert Box(-0.1, 0.5, 0.5, -0.2, 0.9).clip().to_json() == {
+        "top": 0, "right": 0.5, "bottom": 0.5, "left": 0, "score": 0.9}
+    assert Box(1.1, 1.5, 1.5, 1.2).clip() is None
+
+
+def test_box_union():
+    rng = np.random.default_rng(0)
+    a = _random_boxes(rng, 10)
+    b = _random_boxes(rng, 10)
+
+    expected = fb_box.to_array([x.union(y) for x, y in zip(a, b)])
+    assert np.array_equal(fb_box.union(fb_box.to_array(a), fb_box.to_array(b)), expected)
+
+
+def test_box_intersection_over_union():
+    rng = np.random.default_rng(0)
+    a = _random_boxes(rng, 10)
+    b = _random_boxes(rng, 20)
+
+    expected = [[x.intersection_over_union(y) for y in b] for x in a]
+    scores = fb_box.intersection_over_union(fb_box.to_array(a)[:, None], fb_box.to_array(b)[None, :])
+    assert np.allclose(scores, expected)
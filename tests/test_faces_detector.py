@@ -0,0 +1,81 @@
+# Copyright (C) 2025, Simona Dimitrova
+
+import concurrent.futures as cf
+import pytest
+import time
+
+import faceblur.faces.cascade as fb_cascade
+import faceblur.faces.dlib as fb_dlib
+
+from faceblur.box import Box
+from faceblur.faces.detector import Detector
+from faceblur.faces.dlib import DLibDetector
+from PIL import Image
+
+
+FACE = Box(0.4, 0.6, 0.6, 0.4)
+
+# Frames in which the face is missed in the regions
+MISSED = [3]
+
+
+def _process_frame(detector, image, frame_number, upscale, regions=None):
+    # The face is always there, found slowly in the full frame (i.e. after the next frames were submitted)
+    if regions is None:
+        time.sleep(0.2)
+        return frame_number, [FACE], [[0.0]]
+
+    found = frame_number not in MISSED and any(
+        region.top <= FACE.top and FACE.bottom <= region.bottom
+        and region.left <= FACE.left and FACE.right <= region.right
+        for region in regions)
+    return frame_number, [FACE] if found else [], [[0.0]] if found else []
+
+
+@pytest.fixture
+def detector(monkeypatch):
+    # Same process, so that the fake detection is used
+    monkeypatch.setattr(fb_dlib.cf, "ProcessPoolExecutor", cf.ThreadPoolExecutor)
+    monkeypatch.setattr(fb_dlib, "_process_frame", _process_frame)
+
+    with DLibDetector("hog", roi_interval=10, threads=4) as detector:
+        yield detector
+
+
+def test_dlib_roi(detector):
+    image = Image.new("RGB", (100, 100))
+    for _ in range(25):
+        detector.detect(image)
+
+    # Found in every frame, including the regions right after the (slow) full frame scans
+    # and the ones after it was missed once
+    assert [len(faces) for faces in detector.faces] == [0 if frame in MISSED else 1 for frame in range(25)]
+
+
+class _Candidates(Detector):
+    # MediaPipe finding the face and a candidate (partly) out of the image
+    def __init__(self, model, confidence):
+        super().__init__(None)
+
+    def detect(self, image):
+        self._faces.append([FACE, Box(-0.2, 0.1, 0.1, -0.2), Box(1.1, 1.3, 1.3, 1.1)])
+        return self._faces[-1]
+
+    def close(self):
+        pass
+
+
+def test_cascade(monkeypatch):
+    monkeypatch.setattr(fb_dlib.cf, "ProcessPoolExecutor", cf.ThreadPoolExecutor)
+    monkeypatch.setattr(fb_dlib, "_process_frame", _process_frame)
+    monkeypatch.setattr(fb_cascade.fb_mediapipe, "MediaPipeDetector", _Candidates)
+
+    image = Image.new("RGB", (100, 100))
+    with fb_cascade.CascadeDetector(roi_interval=10, threads=4) as detector:
+        for _ in range(15):
+            detector.detect(image)
+
+        # Only the candidates of the current frame are kept
+        assert detector._fast.faces == []
+
+        assert [len(faces) for faces in detector.faces] == [0 if frame in MISSED else 1 for frame in range(15)]
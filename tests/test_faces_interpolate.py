@@ -0,0 +1,42 @@
+# Copyright (C) 2025, Simona Dimitrova
+
+import pytest
+
+from faceblur.box import Box
+from faceblur.faces.interpolate import interpolate_faces
+
+
+def test_interpolate_faces():
+    a = Box(0.1, 0.2, 0.2, 0.1)
+    b = Box(0.5, 0.6, 0.6, 0.5)
+    c = Box(0.1, 0.9, 0.2, 0.8)
+
+    # Track 0 missing in frames 1-3, track 1 found in frame 2 only
+    frames_with_tracks = [[(a, 0)], [], [(c, 1)], [], [(b, 0)]]
+    tracks = [[a, b], [c]]
+
+    frames = interpolate_faces(tracks, frames_with_tracks, tracking_max_frame_distance=5)
+
+    assert len(frames) == len(frames_with_tracks)
+    assert frames[4] == [b]
+
+    # Track 1 starts in frame 2, so it is interpolated back to the start.
+    # Missing faces go after the ones found, in order of the later face
+    assert frames[0] == [a, c]
+    assert frames[1][0] == c
+    assert frames[2][0] == c
+
+    for frame, expected in [(1, 0.2), (2, 0.3), (3, 0.4)]:
+        face = frames[frame][-1]
+        assert (face.top, face.right, face.bottom, face.left) == pytest.approx(
+            (expected, expected + 0.1, expected + 0.1, expected))
+
+    # The input is not modified
+    assert frames_with_tracks[1] == []
+
+
+def test_interpolate_faces_too_far():
+    a = Box(0.1, 0.2, 0.2, 0.1)
+
+    frames = interpolate_faces([[a, a]], [[(a, 0)], [], [], [(a, 0)]], tracking_max_frame_distance=3)
+    assert frames == [[a], [], [], [a]]
@@ -0,0 +1,203 @@
+# Copyright (C) 2025, Simona Dimitrova
+
+import numpy as np
+import pytest
+
+import faceblur.faces.obfuscate as fb_obfuscate
+
+from faceblur.box import Box
+from faceblur.faces.mode import Mode
+from faceblur.faces.obfuscate import MODES
+from faceblur.faces.obfuscate import blur_faces
+from faceblur.faces.table import FaceTable
+from PIL import Image, ImageFilter
+
+
+def _noise(width=320, height=240):
+    rng = np.random.default_rng(0)
+    return Image.fromarray(rng.integers(0, 256, (height, width, 3), dtype=np.uint8))
+
+
+FACE = Box(0.25, 0.75, 0.75, 0.25)
+
+
+@pytest.mark.parametrize("mode", list(MODES))
+def test_blur_faces(mode):
+    image = _noise()
+    original = np.asarray(image).copy()
+
+    result = np.asarray(blur_faces(mode, image, [FACE]))
+
+    # Only the face changes
+    assert not np.array_equal(result[60:180, 80:240], original[60:180, 80:240])
+    assert np.array_equal(result[:50], original[:50])
+    assert np.array_equal(result[:, :70], original[:, :70])
+
+
+def test_pixelate_faces():
+    result = np.asarray(blur_faces(Mode.PIXELATE, _noise(), [FACE], strength=100))
+
+    # 16 x 12 pixel blocks of the same colour
+    block = result[60:72, 80:96]
+    assert (block == block[0, 0]).all()
+
+
+def test_fill_faces():
+    result = np.asarray(blur_faces(Mode.SOLID, _noise(), [FACE]))
+    assert (result[60:180, 80:240] == 0).all()
+
+
+@pytest.mark.parametrize("mode", [Mode.RECT_BLUR, Mode.GRACEFUL_BLUR])
+@pytest.mark.parametrize("strength", [100, 1000])
+def test_blur_faces_fast(mode, strength, monkeypatch):
+    image = _noise(640, 480).filter(ImageFilter.GaussianBlur(2))
+    faces = [Box(0.1, 0.6, 0.9, 0.1)]
+
+    # Blur at full scale
+    monkeypatch.setattr(fb_obfuscate, "FAST_BLUR_RADIUS", fb_obfuscate.MAX_FILTER_SIZE)
+    monkeypatch.setattr(fb_obfuscate, "MASKS", fb_obfuscate.MaskCache())
+    expected = np.asarray(blur_faces(mode, image.copy(), faces, strength)).astype(np.int64)
+
+    monkeypatch.undo()
+    result = np.asarray(blur_faces(mode, image.copy(), faces, strength)).astype(np.int64)
+
+    difference = np.abs(result - expected)
+    assert difference.mean() < 1
+    assert np.percentile(difference, 99) <= 4
+
+
+def test_mask_cache():
+    cache = fb_obfuscate.MaskCache(maxsize=2, quantisation=4)
+
+    mask = cache.get(100, 120, (5, 6))
+    assert mask.size == (110, 132)
+    assert cache.cache_info() == (0, 1, 2, 1)
+
+    # Same size
+    assert cache.get(100, 120, (5, 6)) is mask
+
+    # Slightly different size: the same mask, scaled
+    scaled = cache.get(101, 121, (5, 6))
+    assert scaled.size == (111, 133)
+    assert np.abs(np.asarray(scaled.resize(mask.size)).astype(int) - np.asarray(mask)).mean() < 2
+    assert cache.cache_info().hits == 2
+
+    # Least recently used masks are dropped
+    cache.get(200, 200, (10, 10))
+    cache.get(300, 300, (15, 15))
+    assert cache.cache_info().currsize == 2
+
+    cache.get(100, 120, (5, 6))
+    assert cache.cache_info().misses == 4
+
+
+def test_plan():
+    boxes = np.array([
+        [0, 10, 10, 0],
+        [50, 60, 60, 50],
+        [5, 20, 20, 5],
+        # Does not intersect any of the faces, but the region of the first two
+        [15, 30, 30, 12],
+    ])
+
+    assert fb_obfuscate._plan(boxes) == [([50, 60, 60, 50], [1]), ([0, 30, 30, 0], [0, 2, 3])]
+
+
+@pytest.mark.parametrize("mode", [Mode.RECT_BLUR, Mode.GRACEFUL_BLUR])
+def test_blur_faces_overlapping(mode):
+    face = Box(0.2, 0.5, 0.6, 0.2)
+    other = Box(0.3, 0.6, 0.7, 0.3)
+
+    # The same face twice (e.g. found and interpolated) is blurred only once
+    expected = np.asarray(blur_faces(mode, _noise(), [face]))
+    assert np.array_equal(np.asarray(blur_faces(mode, _noise(), [face, face])), expected)
+
+    # Overlapping faces: everything outside of the faces is the same
+    result = np.asarray(blur_faces(mode, _noise(), [face, other]))
+    original = np.asarray(_noise())
+    assert np.array_equal(result[:40], original[:40])
+    assert np.array_equal(result[200:], original[200:])
+
+
+@pytest.mark.parametrize("mode", list(MODES))
+def test_blur_faces_threads(mode):
+    rng = np.random.default_rng(0)
+    faces = []
+    for y, x in rng.uniform(0, 0.8, (20, 2)).tolist():
+        faces.append(Box(y, x + 0.15, y + 0.2, x))
+
+    expected = np.asarray(blur_faces(mode, _noise(), faces))
+
+    with fb_obfuscate.create_executor(4) as executor:
+        result = np.asarray(blur_faces(mode, _noise(), faces, executor=executor))
+
+    assert np.array_equal(result, expected)
+
+
+@pytest.mark.parametrize("mode", [Mode.RECT_BLUR, Mode.GRACEFUL_BLUR])
+def test_blur_faces_patch_cache(mode):
+    faces = FaceTable(1, [0], [[0.25, 0.75, 0.75, 0.25]], tracks=[0])
+    cache = fb_obfuscate.PatchCache(max_age=2)
+
+    expected = np.asarray(blur_faces(mode, _noise(), faces))
+
+    # Same face, same pixels: blurred once
+    for _ in range(3):
+        cache.next_frame()
+        assert np.array_equal(np.asarray(blur_faces(mode, _noise(), faces, cache=cache)), expected)
+
+    assert cache.cache_info().hits == 2
+    assert cache.cache_info().misses == 1
+
+    # Too old
+    cache.next_frame()
+    blur_faces(mode, _noise(), faces, cache=cache)
+    assert cache.cache_info().misses == 2
+
+    # Too old after frames without faces
+    cache.next_frame()
+    cache.next_frame()
+    cache.next_frame()
+    blur_faces(mode, _noise(), faces, cache=cache)
+    assert cache.cache_info().misses == 3
+
+    # Different pixels
+    cache.next_frame()
+    image = Image.fromarray(255 - np.asarray(_noise()))
+    result = np.asarray(blur_faces(mode, image.copy(), faces, cache=cache))
+    assert np.array_equal(result, np.asarray(blur_faces(mode, image, faces)))
+    assert cache.cache_info().misses == 4
+
+    # Untracked faces are never reused
+    untracked = FaceTable(1, [0], [[0.25, 0.75, 0.75, 0.25]])
+    for _ in range(2):
+        cache.next_frame()
+        blur_faces(mode, _noise(), untracked, cache=cache)
+    assert cache.cache_info().hits + cache.cache_info().misses == 6
+
+
+@pytest.mark.parametrize("mode", list(MODES))
+@pytest.mark.parametrize("strength", [50, 100, 400])
+def test_blur_faces_array(mode, strength):
+    # Away from the edges of the image, as PIL crops them with black borders
+    faces = [Box(0.3, 0.45, 0.6, 0.2), Box(0.4, 0.8, 0.7, 0.55), Box(0.5, 0.85, 0.75, 0.7)]
+
+    expected = np.asarray(blur_faces(mode, _noise(640, 480), faces, strength))
+
+    array = np.array(_noise(640, 480))
+    assert blur_faces(mode, array, faces, strength) is array
+
+    difference = np.abs(array.astype(np.int16) - expected)
+    assert difference.max() <= 3
+    assert difference.mean() < 0.1
+
+
+@pytest.mark.parametrize("mode", [Mode.RECT_BLUR, Mode.GRACEFUL_BLUR])
+def test_blur_faces_array_edges(mode):
+    # Faces going out of the image
+    array = np.array(_noise())
+    blur_faces(mode, array, [Box(-0.1, 0.3, 0.3, -0.1), Box(0.8, 1.1, 1.1, 0.8)], strength=400)
+
+    original = np.asarray(_noise())
+    assert not np.array_equal(array[:50, :80], original[:50, :80])
+    assert np.array_equal(array[100:150], original[100:150])
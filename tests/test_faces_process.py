@@ -0,0 +1,157 @@
+# Copyright (C) 2025, Simona Dimitrova
+
+import numpy as np
+import pytest
+
+import faceblur.faces.index as fb_index
+
+from faceblur.box import Box
+from faceblur.faces.process import OnlineProcessor
+from faceblur.faces.process import process_faces
+from faceblur.faces.process import process_faces_in_frames
+from faceblur.faces.table import FaceTable
+
+
+def _random_frames(rng, count=120, people=6):
+    # People moving around, often not found for a few frames, and some false positives
+    positions = rng.uniform(0.05, 0.85, (people, 2))
+    identities = rng.normal(0, 0.2, (people, 128))
+
+    frames = []
+    encodings = []
+    for frame in range(count):
+        positions += rng.normal(0, 0.003, positions.shape)
+        found = rng.uniform(size=people) > 0.4
+
+        faces = [Box(y, x + 0.1, y + 0.1, x) for (y, x) in positions[found].tolist()]
+        face_encodings = list(identities[found] + rng.normal(0, 0.01, (found.sum(), 128)))
+
+        if rng.uniform() < 0.1:
+            y, x = rng.uniform(0, 0.9, 2).tolist()
+            faces.append(Box(y, x + 0.05, y + 0.05, x))
+            face_encodings.append(rng.normal(0, 0.2, 128))
+
+        frames.append(faces)
+        encodings.append(face_encodings)
+
+    return frames, encodings
+
+
+@pytest.mark.parametrize("use_encodings", [False, True])
+def test_process_faces_expired_track(use_encodings):
+    face = Box(0.1, 0.3, 0.3, 0.1)
+    encoding = np.zeros(128)
+
+    def process(frames, min_face_duration):
+        encodings = [[encoding] * len(faces) for faces in frames]
+        expected = process_faces_in_frames(frames, encodings if use_encodings else [], 10,
+                                           min_face_duration=min_face_duration, tracking_duration=1)[1]
+
+        # Same when processing the frames one at a time
+        processor = OnlineProcessor(10, use_encodings, min_face_duration=min_face_duration, tracking_duration=1)
+        processed = []
+        for frame_index, faces in enumerate(frames):
+            processed += processor.push(frame_index, faces, encodings[frame_index] if use_encodings else None)
+        processed += processor.close()
+
+        assert [faces for frame_index, faces in processed] == expected
+        return expected
+
+    # A face found for 1.5 seconds, not found for 2 seconds, and then found for 1.5 seconds
+    frames = [[face]] * 15 + [[]] * 20 + [[face]] * 15
+
+    # Too long to interpolate, but the face is found for long enough overall
+    assert process(frames, min_face_duration=2) == frames
+    assert process(frames, min_face_duration=4) == [[]] * len(frames)
+
+    # Not found for longer than the tracking and min face durations: a different face
+    frames = [[face]] * 15 + [[]] * 40 + [[face]] * 15
+    assert process(frames, min_face_duration=2) == [[]] * len(frames)
+
+
+def test_process_faces_confidence():
+    # The detections of a model with scores: a face and a less likely one in every frame
+    face = Box(0.1, 0.3, 0.3, 0.1, 0.9)
+    unlikely = Box(0.6, 0.8, 0.8, 0.6, 0.3)
+    table = FaceTable.from_frames([[face, unlikely]] * 10)
+
+    # Filtered again without running the model
+    assert process_faces(table, 10)[1].to_frames() == [[face, unlikely]] * 10
+    assert process_faces(table, 10, confidence=50)[1].to_frames() == [[face]] * 10
+    assert process_faces(table, 10, confidence=95)[1].to_frames() == [[]] * 10
+
+    # Faces without scores are always kept
+    table = FaceTable.from_frames([[Box(0.1, 0.3, 0.3, 0.1)]] * 10)
+    assert len(process_faces(table, 10, confidence=95)[1]) == 10
+
+
+def test_process_faces_encoding_smoothing():
+    face = Box(0.1, 0.3, 0.3, 0.1)
+    direction = np.zeros(128)
+    direction[0] = 1
+
+    # A single bad face encoding between two similar ones
+    frames = [[face]] * 21
+    encodings = [[np.zeros(128)]] * 10 + [[direction * 0.5]] + [[direction * -0.2]] * 10
+
+    # Split in two tracks that are too short
+    processed = process_faces_in_frames(frames, encodings, 10, min_face_duration=1.5)[1]
+    assert processed == [[]] * len(frames)
+
+    # Still a single track when comparing against the mean
+    processed = process_faces_in_frames(frames, encodings, 10, min_face_duration=1.5, encoding_smoothing=90)[1]
+    assert processed == frames
+
+
+def test_process_faces_encoding_index(monkeypatch):
+    rng = np.random.default_rng(0)
+    frames, encodings = _random_frames(rng)
+
+    indices = []
+
+    class LshIndex(fb_index.LshIndex):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            indices.append(self)
+
+    monkeypatch.setattr(fb_index, "LshIndex", LshIndex)
+
+    expected = process_faces_in_frames(frames, encodings, 25)[1]
+    assert not indices
+
+    # Same faces, but matched through the index
+    processed = process_faces_in_frames(frames, encodings, 25, encoding_index=True)[1]
+    assert indices
+    assert processed == expected
+
+
+@pytest.mark.parametrize("use_encodings, prediction", [(False, False), (False, True), (True, False)])
+@pytest.mark.parametrize("min_face_duration, tracking_duration", [(0, 0), (0.1, 0.2), (0.3, 0.5), (1, 1)])
+def test_online_processor(use_encodings, prediction, min_face_duration, tracking_duration):
+    rng = np.random.default_rng(0)
+    frames, encodings = _random_frames(rng)
+    frame_rate = 25
+
+    expected = process_faces_in_frames(frames, encodings if use_encodings else [], frame_rate,
+                                       min_face_duration=min_face_duration, tracking_duration=tracking_duration,
+                                       prediction=prediction)[1]
+
+    processor = OnlineProcessor(frame_rate, use_encodings,
+                                min_face_duration=min_face_duration, tracking_duration=tracking_duration,
+                                prediction=prediction)
+
+    processed = []
+    max_delay = 0
+    for frame_index, faces in enumerate(frames):
+        finalised = processor.push(frame_index, faces, encodings[frame_index] if use_encodings else None)
+        if finalised:
+            max_delay = max(max_delay, frame_index - finalised[-1][0])
+        processed += finalised
+
+    processed += processor.close()
+
+    assert [frame_index for frame_index, faces in processed] == list(range(len(frames)))
+    assert [faces for frame_index, faces in processed] == expected
+
+    # Frames are returned before the end
+    assert max_delay < len(frames) // 2
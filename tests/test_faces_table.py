@@ -0,0 +1,47 @@
+# Copyright (C) 2025, Simona Dimitrova
+
+import numpy as np
+
+from faceblur.box import Box
+from faceblur.faces.table import FaceTable
+
+
+def test_face_table_from_frames():
+    frames = [
+        [Box(0.1, 0.2, 0.2, 0.1, 0.9), Box(0.5, 0.6, 0.6, 0.5)],
+        [],
+        [Box(0.3, 0.4, 0.4, 0.3, 0.5)],
+        [],
+    ]
+    encodings = [[np.zeros(128), np.ones(128)], [], [np.full(128, 2)], []]
+
+    table = FaceTable.from_frames(frames, encodings)
+
+    assert len(table) == 3
+    assert table.frame_count == len(frames)
+    assert table.frames.tolist() == [0, 0, 2]
+    assert table.offsets.tolist() == [0, 2, 2, 3, 3]
+    assert table.encodings.shape == (3, 128)
+    assert table.tracks.tolist() == [-1, -1, -1]
+
+    assert table.to_frames() == frames
+    assert [face.score for face in table] == [0.9, None, 0.5]
+
+    # Views of a single frame
+    frame = table.frame(2)
+    assert list(frame) == frames[2]
+    assert frame.encodings.tolist() == [[2] * 128]
+    assert np.shares_memory(frame.boxes, table.boxes)
+    assert list(table.frame(3)) == []
+
+    assert FaceTable.from_frames(frames).encodings is None
+
+
+def test_face_table_select():
+    frames = [[Box(0.1, 0.2, 0.2, 0.1), Box(0.5, 0.6, 0.6, 0.5)], [Box(0.3, 0.4, 0.4, 0.3)]]
+
+    table = FaceTable.from_frames(frames).with_tracks([0, 1, 0])
+    table = table.select(table.tracks == 0)
+
+    assert table.to_frames() == [[frames[0][0]], frames[1]]
+    assert table.tracks.tolist() == [0, 0]
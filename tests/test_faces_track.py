@@ -0,0 +1,178 @@
+# Copyright (C) 2025, Simona Dimitrova
+
+import numpy as np
+import pytest
+
+from faceblur.box import Box
+from faceblur.faces.track import IouTracker
+from faceblur.faces.track import TrackState
+from faceblur.faces.track import track_faces_encodings
+from faceblur.faces.track import track_faces_iou
+
+
+def _moving_face(frame, x, y, size=0.1, speed=0.01):
+    offset = frame * speed
+    return Box(y, x + size + offset, y + size, x + offset)
+
+
+def test_track_faces_iou_shape():
+    frames = [[_moving_face(frame, 0.1, 0.1), _moving_face(frame, 0.6, 0.6)] for frame in range(10)]
+    frames.insert(5, [])
+
+    tracks, frames_with_tracks = track_faces_iou(frames)
+
+    assert len(frames_with_tracks) == len(frames)
+    assert len(tracks) == 2
+    assert all(len(track) == 10 for track in tracks)
+
+    for faces, faces_with_tracks in zip(frames, frames_with_tracks):
+        assert [face for face, track_index in faces_with_tracks] == faces
+        assert [track_index for face, track_index in faces_with_tracks] == list(range(len(faces)))
+
+
+@pytest.mark.parametrize("min_overlap", [0, 5, 50])
+def test_track_faces_iou_one_face_per_track(min_overlap):
+    # Two faces overlapping the same face from the previous frame
+    frames = [
+        [Box(0.1, 0.3, 0.3, 0.1)],
+        [Box(0.1, 0.3, 0.3, 0.12), Box(0.1, 0.29, 0.3, 0.1)],
+    ]
+
+    tracks, frames_with_tracks = track_faces_iou(frames, min_overlap)
+
+    track_indices = [track_index for face, track_index in frames_with_tracks[1]]
+    assert len(set(track_indices)) == 2
+    assert len(tracks) == 2
+
+
+def test_track_faces_iou_expiry():
+    face = Box(0.1, 0.3, 0.3, 0.1)
+
+    # The same face, with a gap of 5 frames after the first 2 frames
+    frames = [[face], [face], [], [], [], [], [], [face]]
+
+    tracks, frames_with_tracks = track_faces_iou(frames, max_frame_distance=10)
+    assert len(tracks) == 1
+
+    tracks, frames_with_tracks = track_faces_iou(frames, max_frame_distance=3)
+    assert len(tracks) == 2
+    assert [len(track) for track in tracks] == [2, 1]
+
+
+def test_tracker_states():
+    tracker = IouTracker(max_frame_distance=3, max_continue_distance=5)
+    face = Box(0.1, 0.3, 0.3, 0.1)
+
+    tracker.update(0, [face])
+    assert tracker.states == [TrackState.ACTIVE]
+
+    tracker.update(1, [])
+    assert tracker.states == [TrackState.LOST]
+
+    tracker.update(3, [])
+    assert tracker.states == [TrackState.EXPIRED]
+
+    tracker.update(4, [face])
+    assert tracker.states == [TrackState.EXPIRED, TrackState.ACTIVE]
+
+    # A new track, but the same face
+    assert tracker.identities == [0, 0]
+
+    tracker.update(5, [Box(0.6, 0.8, 0.8, 0.6)])
+    assert tracker.identities == [0, 0, 2]
+
+    # Found again too late to be continued
+    tracker.update(10, [Box(0.6, 0.8, 0.8, 0.6)])
+    assert tracker.identities == [0, 0, 2, 3]
+
+
+def test_track_faces_encodings():
+    encodings = [np.zeros(128), np.ones(128)]
+    faces = [Box(0.1, 0.3, 0.3, 0.1), Box(0.5, 0.7, 0.7, 0.5)]
+
+    frames = [faces, [], faces[::-1]]
+    encodings = [encodings, [], encodings[::-1]]
+
+    tracks, frames_with_tracks = track_faces_encodings(frames, encodings)
+    assert len(tracks) == 2
+    assert [track_index for face, track_index in frames_with_tracks[2]] == [1, 0]
+
+
+@pytest.mark.parametrize("encoding_smoothing", [0, 50])
+def test_track_faces_encodings_one_face_per_track(encoding_smoothing):
+    rng = np.random.default_rng(0)
+    person = rng.normal(0, 0.1, 128)
+    face = Box(0.1, 0.3, 0.3, 0.1)
+
+    # Two faces close to the same person in the same frame
+    frames = [[face], [face, face]]
+    encodings = [[person], [person + 0.001, person + 0.002]]
+
+    tracks, frames_with_tracks = track_faces_encodings(frames, encodings, encoding_smoothing=encoding_smoothing)
+    assert [track_index for face, track_index in frames_with_tracks[1]] == [0, 1]
+
+
+def test_track_faces_encodings_index():
+    rng = np.random.default_rng(0)
+    people = rng.normal(0, 0.2, (50, 128))
+    face = Box(0.1, 0.3, 0.3, 0.1)
+
+    # Each person shows up every 50 frames, with slightly different encodings
+    frames = []
+    encodings = []
+    for frame in range(100):
+        person = people[frame % len(people)]
+        frames.append([face])
+        encodings.append([person + rng.normal(0, 0.01, 128)])
+
+    expected, expected_frames = track_faces_encodings(frames, encodings)
+    tracks, frames_with_tracks = track_faces_encodings(frames, encodings, encoding_index=True)
+
+    assert len(expected) == len(people)
+    assert len(tracks) == len(people)
+    assert frames_with_tracks == expected_frames
+
+
+@pytest.mark.parametrize("max_frame_distance", [None, 5])
+def test_track_faces_iou_grid(max_frame_distance):
+    rng = np.random.default_rng(0)
+
+    # A crowd of small faces moving around randomly, some of them not found in some frames
+    positions = rng.uniform(-0.05, 0.95, (300, 2))
+    frames = []
+    for frame in range(20):
+        positions += rng.normal(0, 0.005, positions.shape)
+        found = rng.uniform(size=len(positions)) > 0.2
+        frames.append([Box(y, x + 0.03, y + 0.03, x) for (y, x) in positions[found].tolist()])
+
+    expected, expected_frames = track_faces_iou(frames, max_frame_distance=max_frame_distance, grid=0)
+    tracks, frames_with_tracks = track_faces_iou(frames, max_frame_distance=max_frame_distance)
+
+    assert tracks == expected
+    assert frames_with_tracks == expected_frames
+
+
+@pytest.mark.parametrize("grid", [0, 16])
+def test_track_faces_iou_prediction(grid):
+    # A face speeding up, then found only every other frame, i.e. it moves more than its size between detections
+    positions = [0, 0.06, 0.12, 0.18] + [0.18 + 0.06 * step for step in range(1, 12)]
+    frames = [
+        [Box(0.4, x + 0.1, 0.5, x)] if frame < 4 or frame % 2 == 0 else []
+        for frame, x in enumerate(positions)]
+
+    tracker = IouTracker(max_frame_distance=10, grid=grid)
+    for frame_index, faces in enumerate(frames):
+        tracker.update(frame_index, faces)
+
+    assert len(tracker.tracks) > 1
+
+    tracker = IouTracker(max_frame_distance=10, grid=grid, prediction=True)
+    for frame_index, faces in enumerate(frames):
+        tracker.update(frame_index, faces)
+
+    assert len(tracker.tracks) == 1
+
+    # Where it would be in the next frame
+    tracks, boxes = tracker.predict(len(frames))
+    assert tracks.tolist() == [0]
+    assert boxes[0, 3] == pytest.approx(positions[-1] + 0.06, abs=0.02)
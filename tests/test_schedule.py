@@ -0,0 +1,67 @@
+# Copyright (C) 2025, Simona Dimitrova
+
+import pytest
+
+import faceblur.schedule as fb_schedule
+
+from faceblur.schedule import Estimator, Policy, schedule
+from PIL import Image
+
+
+FILES = ["a.mp4", "b.jpg", "c.jpg", "d.mkv"]
+
+COSTS = {
+    "a.mp4": 1920 * 1080 * 1000,
+    "b.jpg": 4000 * 3000,
+    "c.jpg": 4000 * 3000,
+    "d.mkv": 640 * 480 * 100,
+}
+
+
+@pytest.mark.parametrize("policy, expected", [
+    (Policy.INPUT, FILES),
+    (Policy.SHORTEST_FIRST, ["b.jpg", "c.jpg", "d.mkv", "a.mp4"]),
+    (Policy.LARGEST_FIRST, ["a.mp4", "d.mkv", "b.jpg", "c.jpg"]),
+])
+def test_schedule(policy, expected):
+    assert schedule(FILES, COSTS, policy) == expected
+
+
+def test_estimate_cost_image(tmp_path):
+    filename = str(tmp_path / "image.png")
+    Image.new("RGB", (40, 30)).save(filename)
+
+    assert fb_schedule.estimate_cost(filename) == 40 * 30
+
+    # Broken files are estimated as no work
+    broken = tmp_path / "broken.png"
+    broken.write_bytes(b"broken")
+    assert fb_schedule.estimate_cost(str(broken)) == 0
+
+
+def test_estimator():
+    now = [0.0]
+    estimator = Estimator(COSTS, clock=lambda: now[0])
+    assert estimator.remaining() is None
+
+    # 2 seconds for an image
+    estimator.start("b.jpg")
+    now[0] += 2
+    estimator.done("b.jpg")
+
+    # Videos are assumed to take as long per pixel until one of them is done
+    images = 2
+    videos = 2 * (COSTS["a.mp4"] + COSTS["d.mkv"]) / COSTS["b.jpg"]
+    assert estimator.remaining() == pytest.approx(images + videos)
+
+    # Then they have their own rate: 1 second for the small video
+    estimator.start("d.mkv")
+    now[0] += 1
+    estimator.done("d.mkv")
+
+    assert estimator.remaining() == pytest.approx(images + COSTS["a.mp4"] / COSTS["d.mkv"])
+
+
+def test_format_remaining():
+    assert fb_schedule.format_remaining(59.6) == "01:00 remaining"
+    assert fb_schedule.format_remaining(2 * 3600 + 3 * 60 + 4) == "2:03:04 remaining"
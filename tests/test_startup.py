@@ -0,0 +1,38 @@
+# Copyright (C) 2025, Simona Dimitrova
+
+import os
+import pytest
+import subprocess
+import sys
+
+# Heavy (ML) modules that must be loaded only once a model is actually used
+FORBIDDEN = [
+    "mediapipe",
+    "face_recognition",
+    "dlib",
+    "pillow_heif",
+]
+
+
+def _imported_modules(code):
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(sys.path)
+
+    result = subprocess.run([sys.executable, "-c", f"{code}; import sys; print(' '.join(sys.modules))"],
+                            env=env, capture_output=True, text=True, check=True)
+
+    return set(result.stdout.split())
+
+
+@pytest.mark.parametrize("module", ["faceblur.frontend.cli", "faceblur.help", "faceblur.app"])
+def test_import_does_not_load_models(module):
+    modules = _imported_modules(f"import {module}")
+
+    for forbidden in FORBIDDEN:
+        assert forbidden not in modules
+
+
+def test_import_does_not_enumerate_encoders():
+    modules = _imported_modules("import faceblur.frontend.cli, faceblur.av.video as v; "
+                                "assert v.get_encoders.cache_info().currsize == 0")
+    assert "faceblur.av.video" in modules